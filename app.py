@@ -4,17 +4,21 @@ Main Flask application for scraping LinkedIn profiles, parsing resumes, and veri
 """
 
 import os
+import json
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 
 # Import services
 from services.linkedin_scraper import scrape_linkedin_profile
-from services.resume_parser import pdf_to_text_minimal_tokens, parse_resume_with_groq
+from services.resume_parser import parse_resume_bytes, stream_resume_bytes, get_parse_stats
 from services.linkedin_finder import find_linkedin, find_linkedin_bulk
-from services.enrichment import enrich_candidate
+from services.enrichment import enrich_candidate, warm_nlp
+from services import jobs
+from services.cache import all_stats as cache_stats
 
 # from dotenv import load_dotenv
 # # # Only for local
@@ -28,11 +32,21 @@ CORS(app)
 # Configuration
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['UPLOAD_FOLDER'] = '/tmp/uploads'
+# Max number of ZIP members processed at the same time (1 = sequential)
+app.config['ZIP_CONCURRENCY'] = int(os.environ.get('ZIP_CONCURRENCY', 4))
+# Uncompressed size limits for ZIP uploads (per member / whole archive)
+app.config['ZIP_MAX_MEMBER_SIZE'] = int(os.environ.get('ZIP_MAX_MEMBER_SIZE', 16 * 1024 * 1024))
+app.config['ZIP_MAX_TOTAL_SIZE'] = int(os.environ.get('ZIP_MAX_TOTAL_SIZE', 256 * 1024 * 1024))
 ALLOWED_EXTENSIONS = ['pdf', 'jpg', 'jpeg', 'png', 'bmp']
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# Load the enrichment NLP model at boot (in the background) instead of on the
+# first enrichment request
+if os.environ.get('NLP_WARMUP', '1') == '1':
+    warm_nlp()
+
 
 def allowed_file(filename):
     """Check if file extension is allowed."""
@@ -53,6 +67,26 @@ def health_check():
     }), 200
 
 
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats_endpoint():
+    """Hit/miss counters (this worker process) and disk usage of the local caches."""
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'data': cache_stats()
+    }), 200
+
+
+@app.route('/api/parse/stats', methods=['GET'])
+def parse_stats_endpoint():
+    """Per-model parse latency and escalation rate (this worker process)."""
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'data': get_parse_stats()
+    }), 200
+
+
 @app.route('/', methods=['GET'])
 def index():
     """Root endpoint with API documentation."""
@@ -61,12 +95,16 @@ def index():
         'version': '1.0.0',
         'endpoints': {
             'GET /health': 'Health check',
-            'POST /api/parse-resume': 'Parse PDF resume to structured JSON',
+            'POST /api/parse-resume': 'Parse PDF resume to structured JSON (?stream=1 for NDJSON partial results)',
             'POST /api/find-linkedin': 'Find LinkedIn profile by name/company',
             'POST /api/find-linkedin-bulk': 'Find LinkedIn profiles for multiple people',
             'POST /api/scrape-linkedin': 'Scrape LinkedIn profile data',
             'POST /api/verify': 'Verify resume against LinkedIn profile',
-            'POST /api/enrich-resume': 'Enrich resume data with LinkedIn data'
+            'POST /api/enrich-resume': 'Enrich resume data with LinkedIn data',
+            'POST /api/upload-resume': 'Upload resume(s) or a ZIP, parse and store (?async=1 to queue a job)',
+            'GET /api/jobs/<job_id>': 'Status and results of a queued upload job',
+            'GET /api/cache/stats': 'Hit/miss counters and size of the local caches',
+            'GET /api/parse/stats': 'Per-model parse latency (p50/p95) and escalation rate'
         },
         'documentation': 'See README.md for detailed usage'
     }), 200
@@ -86,6 +124,9 @@ def parse_resume():
     
     Returns:
         - Structured resume data in JSON format
+        - With ?stream=1, newline-delimited JSON events (application/x-ndjson):
+          text stats, locally extracted header fields, each section as soon
+          as it is parsed, then the final result (see stream_resume_events)
     """
     try:
         # Check if file was uploaded
@@ -109,27 +150,24 @@ def parse_resume():
                 'error': 'Invalid file type. Only PDF allowed.'
             }), 400
         
-        # Save file temporarily
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # Extract text and parse with Groq API (cached by file content)
+        ext = os.path.splitext(secure_filename(file.filename))[1]
         
-        # Extract text from PDF
-        resume_text = pdf_to_text_minimal_tokens(filepath)
+        if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+            return Response(
+                stream_with_context(stream_resume_events(file.read(), ext)),
+                mimetype='application/x-ndjson',
+                headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'}
+            )
         
-        if not resume_text:
-            os.remove(filepath)
+        try:
+            structured_resume = parse_resume_bytes(file.read(), ext)
+        except ValueError:
             return jsonify({
                 'success': False,
                 'error': 'Failed to extract text from PDF'
             }), 500
         
-        # Parse with Groq API
-        structured_resume = parse_resume_with_groq(resume_text)
-        
-        # Clean up
-        os.remove(filepath)
-        
         if not structured_resume:
             return jsonify({
                 'success': False,
@@ -149,11 +187,26 @@ def parse_resume():
         }), 500
 
 
+def stream_resume_events(content, ext):
+    """NDJSON lines of stream_resume_bytes events; failures end the stream with an error event."""
+    try:
+        for event in stream_resume_bytes(content, ext):
+            if event['event'] == 'result' and not event['data']:
+                event = {'event': 'error', 'error': 'Failed to parse resume with AI'}
+            yield json.dumps(event, ensure_ascii=False) + '\n'
+    except ValueError:
+        yield json.dumps({'event': 'error', 'error': 'Failed to extract text from PDF'}) + '\n'
+    except Exception as e:
+        yield json.dumps({'event': 'error', 'error': f'Internal server error: {str(e)}'}) + '\n'
+
+
 @app.route('/api/upload-resume', methods=['POST'])
 def upload_resume():
     """
     Upload resume(s), parse, and store in DB/Storage.
     Supports single PDF/Image or ZIP file containing multiple resumes.
+    With ?async=1 the files are queued and a job id is returned immediately
+    (poll GET /api/jobs/<job_id>).
     """
     try:
         print("Upload request received")
@@ -162,6 +215,7 @@ def upload_resume():
         
         file = request.files['file']
         job_offer_id = request.form.get('job_offer_id')
+        async_mode = request.args.get('async', '').lower() in ('1', 'true', 'yes')
         
         if file.filename == '':
             return jsonify({'success': False, 'error': 'No file selected'}), 400
@@ -172,52 +226,43 @@ def upload_resume():
         # 1. Handle ZIP File
         if ext == 'zip':
             import zipfile
-            results = []
-            errors = []
-            
-            # Save ZIP temporarily
-            zip_filename = secure_filename(file.filename)
-            zip_path = os.path.join(app.config['UPLOAD_FOLDER'], zip_filename)
-            file.save(zip_path)
             
             try:
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    # Extract all to a temp dir
-                    extract_dir = os.path.join(app.config['UPLOAD_FOLDER'], f"extract_{datetime.now().strftime('%Y%m%d%H%M%S')}")
-                    os.makedirs(extract_dir, exist_ok=True)
-                    zip_ref.extractall(extract_dir)
-                    
-                    # Loop through files
-                    for root, dirs, files in os.walk(extract_dir):
-                        for filename in files:
-                            # Skip hidden files or system files if needed
-                            if filename.startswith('__MACOSX') or filename.startswith('.'):
-                                continue
-                                
-                            file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-                            if file_ext not in ALLOWED_EXTENSIONS:
-                                errors.append({'filename': filename, 'error': 'Invalid file type'})
-                                continue
-                                
-                            filepath = os.path.join(root, filename)
+                # Members are read straight from the uploaded stream, nothing is extracted to disk
+                with zipfile.ZipFile(file.stream, 'r') as zip_ref:
+                    entries = []
+                    total_size = 0
+                    for info in zip_ref.infolist():
+                        if info.is_dir():
+                            continue
+                        filename = os.path.basename(info.filename)
+                        # Skip hidden files or system files if needed
+                        if info.filename.startswith('__MACOSX') or filename.startswith('.'):
+                            continue
                             
-                            # Process file
-                            try:
-                                result = process_single_resume(filepath, filename, job_offer_id)
-                                results.append(result)
-                            except Exception as e:
-                                print(f"Error processing {filename}: {e}")
-                                errors.append({'filename': filename, 'error': str(e)})
-                                
-                    # Clean up extracted files
-                    import shutil
-                    shutil.rmtree(extract_dir)
+                        file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+                        if file_ext not in ALLOWED_EXTENSIONS:
+                            entries.append((filename, None))
+                            continue
+                        
+                        total_size += info.file_size
+                        entries.append((filename, _zip_member_reader(zip_ref, info)))
+                    
+                    if total_size > app.config['ZIP_MAX_TOTAL_SIZE']:
+                        return jsonify({
+                            'success': False,
+                            'error': f"ZIP content too large (max {app.config['ZIP_MAX_TOTAL_SIZE'] // (1024 * 1024)}MB uncompressed)"
+                        }), 413
+                    
+                    if async_mode:
+                        return queue_upload_job(entries, job_offer_id)
                     
+                    results, errors = process_resume_batch(entries, job_offer_id)
+                    
+            except zipfile.BadZipFile as e:
+                return jsonify({'success': False, 'error': f"Invalid ZIP file: {str(e)}"}), 400
             except Exception as e:
                 return jsonify({'success': False, 'error': f"Failed to process ZIP: {str(e)}"}), 500
-            finally:
-                if os.path.exists(zip_path):
-                    os.remove(zip_path)
             
             return jsonify({
                 'success': True,
@@ -228,13 +273,14 @@ def upload_resume():
             
         # 2. Handle Single File (PDF/Image)
         elif ext in ALLOWED_EXTENSIONS:
-            # Save locally
             filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
+            
+            if async_mode:
+                content = file.read()
+                return queue_upload_job([(filename, lambda: content)], job_offer_id)
             
             try:
-                data = process_single_resume(filepath, filename, job_offer_id)
+                data = process_single_resume(file.read(), filename, job_offer_id)
                 
                 # Maintain original response format for single file
                 return jsonify({
@@ -244,9 +290,6 @@ def upload_resume():
                 }), 201
             except Exception as e:
                 return jsonify({'success': False, 'error': str(e)}), 500
-            finally:
-                if os.path.exists(filepath):
-                    os.remove(filepath)
         
         else:
             return jsonify({'success': False, 'error': 'Invalid file type. Allowed: PDF, JPG, PNG, BMP, ZIP'}), 400
@@ -260,11 +303,129 @@ def upload_resume():
             'error': f'Internal server error: {str(e)}'
         }), 500
 
-def process_single_resume(filepath, original_filename, job_offer_id):
+def _zip_member_reader(zip_ref, info):
+    """
+    Return a callable that reads one ZIP member into memory.
+    The size limit is enforced on the bytes actually decompressed,
+    not only on the size declared in the archive.
+    """
+    def read():
+        limit = app.config['ZIP_MAX_MEMBER_SIZE']
+        if info.file_size > limit:
+            raise ValueError(f"File too large (max {limit // (1024 * 1024)}MB)")
+        with zip_ref.open(info) as member:
+            data = member.read(limit + 1)
+        if len(data) > limit:
+            raise ValueError(f"File too large (max {limit // (1024 * 1024)}MB)")
+        return data
+    return read
+
+
+def queue_upload_job(entries, job_offer_id):
+    """
+    Read the files of an upload into the job queue and return the 202 response.
+    entries has the same (filename, read) shape as for process_resume_batch.
+    """
+    files = []
+    for filename, read in entries:
+        if not read:
+            files.append((filename, None, 'Invalid file type'))
+            continue
+        try:
+            files.append((filename, read(), None))
+        except Exception as e:
+            files.append((filename, None, str(e)))
+    
+    job_id = jobs.create_job(files, job_offer_id)
+    jobs.start_workers(process_single_resume_job)
+    
+    return jsonify({
+        'success': True,
+        'message': f"Queued {len(files)} files",
+        'job_id': job_id,
+        'status_url': f"/api/jobs/{job_id}"
+    }), 202
+
+
+def process_single_resume_job(content, filename, job_offer_id):
+    """Job queue handler (looked up at call time so it can be patched in tests)."""
+    return process_single_resume(content, filename, job_offer_id)
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
     """
-    Helper to parse a single resume file (already saved at filepath),
-    upload to storage, and create DB records.
-    Does NOT delete the file (caller handles cleanup).
+    Status of a queued upload job.
+    
+    Returns per-file status plus the finished results in 'data' and the
+    failed files in 'errors'.
+    """
+    try:
+        # Resume queued work after a restart
+        jobs.start_workers(process_single_resume_job)
+        
+        job = jobs.get_job(job_id)
+        if not job:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            **job
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+
+def _process_entry(read, filename, job_offer_id):
+    return process_single_resume(read(), filename, job_offer_id)
+
+
+def process_resume_batch(entries, job_offer_id, max_workers=None):
+    """
+    Process several resume files concurrently.
+    
+    entries is a list of (filename, read) tuples where read() returns the file
+    bytes; a None reader marks a file with an invalid type. At most max_workers
+    files (default ZIP_CONCURRENCY) are processed, and therefore held in memory,
+    at the same time. A failing file only produces an entry in errors.
+    
+    Returns (results, errors), both in the same order as entries.
+    """
+    if max_workers is None:
+        max_workers = app.config['ZIP_CONCURRENCY']
+    
+    valid_count = sum(1 for _, read in entries if read)
+    max_workers = max(1, min(max_workers, valid_count or 1))
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_process_entry, read, filename, job_offer_id) if read else None
+            for filename, read in entries
+        ]
+        
+        results = []
+        errors = []
+        for (filename, _), future in zip(entries, futures):
+            if future is None:
+                errors.append({'filename': filename, 'error': 'Invalid file type'})
+                continue
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Error processing {filename}: {e}")
+                errors.append({'filename': filename, 'error': str(e)})
+    
+    return results, errors
+
+def process_single_resume(source, original_filename, job_offer_id):
+    """
+    Helper to parse a single resume, upload it to storage, and create DB records.
+    source is either the file content (bytes) or the path of a saved file,
+    which is read once and not deleted (caller handles cleanup).
     Returns dict with candidate_id, resume_id, etc.
     """
     # 1. Unique ID for storage
@@ -273,32 +434,40 @@ def process_single_resume(filepath, original_filename, job_offer_id):
     
     # 2. Parse Resume
     # We use our existing parser which handles PDF and Images
-    # Note: resume_parser.process_file expects a path
     try:
-        # Import here to avoid circular dependencies if any, or just ensure availability
-        from services.resume_parser import process_file, parse_resume_with_groq
-        
-        # Extract text
-        resume_text = process_file(filepath)
-        if not resume_text or "Error:" in resume_text[:10]: # Basic error check
-            raise Exception(f"Failed to extract text: {resume_text}")
+        if isinstance(source, (bytes, bytearray)):
+            file_bytes = source
+        else:
+            with open(source, "rb") as f:
+                file_bytes = f.read()
+        
+        from services.db import (upload_resume_file_dedup, find_candidate_by_email,
+                                 create_candidate, create_resume, create_application)
+        
+        # Extract text and parse with AI (cached by file content).
+        # The candidate lookup only needs the email, which is extracted locally:
+        # it runs while the LLM parses the resume (a miss is checked again
+        # when the candidate is created).
+        ext = os.path.splitext(original_filename)[1]
+        with ThreadPoolExecutor(max_workers=1) as lookup_executor:
+            lookups = {}
             
-        # Parse with AI
-        parsed_data = parse_resume_with_groq(resume_text)
-        if not parsed_data:
-            raise Exception("Failed to parse resume with AI")
+            def start_lookup(fields):
+                if fields["emails"]:
+                    email = fields["emails"][0]
+                    lookups[email] = lookup_executor.submit(find_candidate_by_email, email)
             
-        # 3. Upload to Supabase Storage
-        with open(filepath, "rb") as f:
-            file_bytes = f.read()
+            parsed_data = parse_resume_bytes(file_bytes, ext, on_fields=start_lookup)
+            if not parsed_data:
+                raise Exception("Failed to parse resume with AI")
+            known_candidates = {email: future.result() for email, future in lookups.items()}
             
-        from services.db import upload_resume_file, create_candidate, create_resume, create_application
-        
-        public_url = upload_resume_file(file_bytes, unique_filename)
-        print(f"File uploaded: {unique_filename}")
+        # 3. Upload to Supabase Storage
+        # Identical files are stored once
+        public_url = upload_resume_file_dedup(file_bytes, unique_filename)
         
         # 4. Create DB Records
-        candidate_id = create_candidate(parsed_data)
+        candidate_id = create_candidate(parsed_data, known_candidates=known_candidates)
         resume_id = create_resume(candidate_id, parsed_data, public_url)
         
         application_id = None
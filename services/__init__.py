@@ -1,13 +1,14 @@
 """Services package for LinkedIn Resume Verification API."""
 
 from .linkedin_scraper import scrape_linkedin_profile
-from .resume_parser import pdf_to_text_minimal_tokens, parse_resume_with_groq
+from .resume_parser import pdf_to_text_minimal_tokens, parse_resume_with_groq, parse_resume_bytes
 from .linkedin_finder import find_linkedin, find_linkedin_bulk
 
 __all__ = [
     'scrape_linkedin_profile',
     'pdf_to_text_minimal_tokens',
     'parse_resume_with_groq',
+    'parse_resume_bytes',
     'find_linkedin',
     'find_linkedin_bulk'
 ]
\ No newline at end of file
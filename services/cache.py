@@ -0,0 +1,172 @@
+"""
+Persistent key/value caches backed by SQLite.
+
+Each cache is a single SQLite file under CACHE_DIR, so entries survive
+restarts and are shared by all gunicorn workers. Entries are evicted by age
+(max_age, seconds) and by total size (max_bytes, least recently used first).
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+CACHE_DIR = os.environ.get("CACHE_DIR", "/tmp/resume_cache")
+
+# Eviction is checked every N writes rather than on each one
+_EVICT_EVERY = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    is_json INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at);
+"""
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def sha256_hex(data) -> str:
+    """SHA-256 hex digest of bytes or text."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class DiskCache:
+    def __init__(self, name, max_bytes=None, max_age=None, path=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.path = path or os.path.join(CACHE_DIR, f"{name}.db")
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self):
+        # sqlite3 connections are not shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, default=None):
+        """Return the cached value (or default), refreshing its LRU position."""
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT value, is_json, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            now = time.time()
+            if row is None or (self.max_age and now - row[2] > self.max_age):
+                self._count(False)
+                return default
+
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._count(True)
+            value, is_json = row[0], row[1]
+            return json.loads(value) if is_json else bytes(value)
+        except sqlite3.Error as e:
+            print(f"[Cache {self.name}] read error: {e}")
+            self._count(False)
+            return default
+
+    def set(self, key, value):
+        """Store a JSON-serializable value (or raw bytes)."""
+        is_json = not isinstance(value, (bytes, bytearray))
+        blob = json.dumps(value, ensure_ascii=False).encode("utf-8") if is_json else bytes(value)
+        now = time.time()
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO entries (key, value, is_json, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, blob, int(is_json), len(blob), now, now)
+            )
+        except sqlite3.Error as e:
+            print(f"[Cache {self.name}] write error: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % _EVICT_EVERY == 1
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones above max_bytes."""
+        try:
+            conn = self._conn()
+            if self.max_age:
+                conn.execute("DELETE FROM entries WHERE created_at < ?", (time.time() - self.max_age,))
+            if self.max_bytes:
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > self.max_bytes:
+                    # Walk entries from least recently used until enough space is freed
+                    to_free = total - self.max_bytes
+                    keys = []
+                    for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+                        keys.append(key)
+                        to_free -= size
+                        if to_free <= 0:
+                            break
+                    conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in keys])
+        except sqlite3.Error as e:
+            print(f"[Cache {self.name}] eviction error: {e}")
+
+    def clear(self):
+        self._conn().execute("DELETE FROM entries")
+
+    def stats(self) -> dict:
+        """Hit/miss counters of this process and current size on disk."""
+        entries, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "max_age": self.max_age
+        }
+
+
+def get_cache(name, max_bytes=None, max_age=None) -> DiskCache:
+    """Return the process-wide cache with this name (created on first use)."""
+    cache = _caches.get(name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                cache = DiskCache(name, max_bytes=max_bytes, max_age=max_age)
+                _caches[name] = cache
+    return cache
+
+
+def all_stats() -> dict:
+    """Stats of every cache opened by this process."""
+    return {name: cache.stats() for name, cache in _caches.items()}
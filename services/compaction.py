@@ -0,0 +1,137 @@
+"""
+Compaction of extracted resume text before it is sent to the LLM.
+
+Input tokens drive both Groq latency and rate-limit headroom, so the text
+produced by process_file is reduced to what the parser needs: page markers
+and repeated page furniture (headers, footers, page numbers) are removed,
+lines broken by the PDF layout are merged and whitespace is normalized.
+"""
+
+import re
+
+# Rough average for English/French text with the gpt-oss tokenizers
+CHARS_PER_TOKEN = 4
+
+_PAGE_MARKER = re.compile(r"^--- Page \d+ ---$")
+_PAGE_NUMBER = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:/|of|sur)\s*\d{1,3})?$", re.IGNORECASE)
+_BULLET = re.compile(r"^[•●▪■◦○·*–-]\s*")
+_SPACES = re.compile(r"[ \t ​]+")
+
+# Lines longer than this are content, never page furniture
+_FURNITURE_MAX_CHARS = 80
+# Headers/footers are among the first/last lines of a page
+_FURNITURE_EDGE_LINES = 3
+# Digit runs that may change between pages (years excluded: date lines are content)
+_PAGE_DIGITS = re.compile(r"(?<!\d)(?!(?:19|20)\d\d(?!\d))\d+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (characters / CHARS_PER_TOKEN)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def _split_pages(text):
+    pages = [[]]
+    for line in text.splitlines():
+        if _PAGE_MARKER.match(line.strip()):
+            if pages[-1]:
+                pages.append([])
+        else:
+            pages[-1].append(line)
+    return pages
+
+
+def _furniture_key(line):
+    # Page numbers change from one page to the next
+    return _PAGE_DIGITS.sub("#", line.lower())
+
+
+def _edge_lines(page):
+    """
+    {index: position} of the first and last non-empty lines of a page, the
+    position being ("top", n) or ("bottom", n) for the n-th line from that edge.
+    """
+    filled = [i for i, line in enumerate(page) if line]
+    edges = {i: ("bottom", n) for n, i in enumerate(reversed(filled[-_FURNITURE_EDGE_LINES:]))}
+    edges.update({i: ("top", n) for n, i in enumerate(filled[:_FURNITURE_EDGE_LINES])})
+    return edges
+
+
+def _remove_furniture(pages):
+    """
+    Drop page numbers, and headers/footers: short lines found at the same
+    place at the top (or bottom) of most pages (first occurrence kept). Repeated lines in the body of a
+    page (job titles, dates...) are content and kept.
+    """
+    edges = [_edge_lines(page) for page in pages]
+    repeated = set()
+    if len(pages) > 1:
+        pages_with = {}
+        for i, page in enumerate(pages):
+            for j, position in edges[i].items():
+                if len(page[j]) <= _FURNITURE_MAX_CHARS:
+                    pages_with.setdefault((position, _furniture_key(page[j])), set()).add(i)
+        repeated = {key for key, found_in in pages_with.items() if len(found_in) * 2 > len(pages)}
+
+    seen = set()
+    lines = []
+    for i, page in enumerate(pages):
+        for j, line in enumerate(page):
+            if _PAGE_NUMBER.match(line):
+                continue
+            key = (edges[i].get(j), _furniture_key(line))
+            if key in repeated:
+                if key in seen:
+                    continue
+                seen.add(key)
+            lines.append(line)
+        lines.append("")
+    return lines
+
+
+def _merge_broken_lines(lines):
+    """Join a line to the previous one when it continues the same sentence."""
+    merged = []
+    for line in lines:
+        previous = merged[-1] if merged else ""
+        if (line and previous
+                and line[0].islower()
+                and not _BULLET.match(line)
+                and previous[-1] not in ".:;!?"):
+            # Words hyphenated at the end of a line are joined back
+            separator = "" if previous.endswith("-") else " "
+            merged[-1] = f"{previous}{separator}{line}"
+        elif line or (merged and merged[-1]):
+            # At most one blank line in a row
+            merged.append(line)
+    return merged
+
+
+def compact_text(text: str, max_tokens: int = None) -> str:
+    """
+    Compact resume text and enforce an approximate token budget.
+
+    When the compacted text is still above max_tokens, it is cut at a line
+    boundary (the beginning of a resume holds the contact details and most
+    recent experience).
+    """
+    if not text:
+        return text
+
+    pages = _split_pages(text)
+    pages = [[_SPACES.sub(" ", line).strip() for line in page] for page in pages]
+    lines = _merge_broken_lines(_remove_furniture(pages))
+    compacted = "\n".join(lines).strip()
+
+    before = estimate_tokens(text)
+    after = estimate_tokens(compacted)
+
+    if max_tokens and after > max_tokens:
+        limit = max_tokens * CHARS_PER_TOKEN
+        cut = compacted.rfind("\n", 0, limit)
+        compacted = compacted[:cut if cut > 0 else limit].rstrip()
+        print(f"Resume text above the {max_tokens} tokens budget (~{after}), truncated.")
+        after = estimate_tokens(compacted)
+
+    print(f"Resume text compacted: ~{before} -> ~{after} tokens")
+    return compacted
@@ -1,7 +1,13 @@
 
+import re
 import os
 import mimetypes
+import fcntl
+import threading
+from contextlib import contextmanager
 from supabase import create_client, Client
+from services.cache import get_cache, sha256_hex
+from services.extraction import split_contacts
 
 # from dotenv import load_dotenv
 
@@ -11,16 +17,23 @@ from supabase import create_client, Client
 SUPABASE_URL = os.environ.get("NEXT_PUBLIC_SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("NEXT_PUBLIC_SUPABASE_ANON_KEY")
 BUCKET_NAME = os.environ.get("NEXT_PUBLIC_SUPABASE_STORAGE_BUCKET", "Resumes_lake")
+# How long the URL of an already uploaded file is reused for identical content
+UPLOAD_CACHE_MAX_AGE = int(os.environ.get("UPLOAD_CACHE_MAX_AGE_DAYS", 30)) * 24 * 3600
+# Lock files serializing candidate creation per email (threads, gunicorn and job workers)
+CANDIDATE_LOCK_DIR = os.environ.get("CANDIDATE_LOCK_DIR", "/tmp/candidate_locks")
 
 _supabase: Client = None
+_supabase_lock = threading.Lock()
 
 def init_supabase() -> Client:
-    """Initialize Supabase client."""
+    """Initialize Supabase client (safe to call from worker threads)."""
     global _supabase
     if _supabase is None:
-        if not SUPABASE_URL or not SUPABASE_KEY:
-            raise ValueError("Supabase credentials not found in environment variables.")
-        _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        with _supabase_lock:
+            if _supabase is None:
+                if not SUPABASE_URL or not SUPABASE_KEY:
+                    raise ValueError("Supabase credentials not found in environment variables.")
+                _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
     return _supabase
 
 def upload_resume_file(file_bytes: bytes, filename: str, content_type: str = "application/pdf") -> str:
@@ -66,12 +79,58 @@ def upload_resume_file(file_bytes: bytes, filename: str, content_type: str = "ap
         print(f"Error uploading file to Supabase: {e}")
         raise e
 
-def create_candidate(parsed_data: dict) -> str:
+def upload_resume_file_dedup(file_bytes: bytes, filename: str, content_type: str = "application/pdf") -> str:
+    """
+    Upload resume file unless a byte-identical file was already uploaded.
+    
+    Returns:
+        str: Public URL of the (new or existing) stored file
+    """
+    cache = get_cache("uploaded_files", max_age=UPLOAD_CACHE_MAX_AGE)
+    content_hash = sha256_hex(file_bytes)
+    
+    public_url = cache.get(content_hash)
+    if public_url:
+        print(f"File already uploaded: {public_url}")
+        return public_url
+    
+    public_url = upload_resume_file(file_bytes, filename, content_type)
+    cache.set(content_hash, public_url)
+    return public_url
+
+def find_candidate_by_email(email: str):
+    """Return the ID of the candidate with this email (case-insensitive), or None."""
+    supabase = init_supabase()
+    # ilike without wildcards: % and _ of the address are matched literally
+    pattern = re.sub(r"([\\%_])", r"\\\1", email)
+    res = supabase.table("candidates").select("id").ilike("email", pattern).execute()
+    return res.data[0]["id"] if res.data else None
+
+@contextmanager
+def _candidate_lock(email: str):
+    """
+    Critical section per normalized email, so the lookup and the insert of a
+    candidate are atomic for every thread and process of this host (e.g. the
+    EN and FR versions of a resume processed at the same time).
+    """
+    os.makedirs(CANDIDATE_LOCK_DIR, exist_ok=True)
+    path = os.path.join(CANDIDATE_LOCK_DIR, f"{sha256_hex(email.strip().lower())}.lock")
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def create_candidate(parsed_data: dict, known_candidates: dict = None) -> str:
     """
     Create or get candidate based on email.
     
     Args:
         parsed_data: Parsed resume data containing basic info
+        known_candidates: Optional {email: candidate_id or None} of lookups
+            already done (e.g. started before parsing finished). Only found
+            candidates are reused: a miss may be stale, it is checked again.
         
     Returns:
         str: Candidate ID (UUID)
@@ -80,18 +139,10 @@ def create_candidate(parsed_data: dict) -> str:
     
     # Extract info
     name = parsed_data.get("name", "Unknown Candidate")
-    email = None
-    phone = None
-    
-    # Contact info is typicaly in 'contacts' array or top level fields in schema
-    # The schema used in resume_parser.py puts contacts in a list of strings.
-    # We need to extract email from there.
-    if "contacts" in parsed_data:
-        for contact in parsed_data["contacts"]:
-            if "@" in contact:
-                email = contact
-            elif any(char.isdigit() for char in contact):
-                phone = contact
+    
+    # The schema used in resume_parser.py puts contacts in a list of strings
+    # (emails and phones first, see services/extraction.py).
+    email, phone = split_contacts(parsed_data.get("contacts"))
     
     # Schema also has 'name', 'location', 'linkedin_url'
     linkedin_url = parsed_data.get("linkedin_url")
@@ -100,17 +151,6 @@ def create_candidate(parsed_data: dict) -> str:
     # If no email, we create a new candidate every time? Or try to match by name?
     # Matching by name is risky. Let's assume unique email if present.
     
-    candidate_id = None
-    
-    if email:
-        # Check if exists
-        res = supabase.table("candidates").select("id").eq("email", email).execute()
-        if res.data:
-            candidate_id = res.data[0]["id"]
-            print(f"Found existing candidate: {candidate_id}")
-            return candidate_id
-            
-    # Create new
     candidate_data = {
         "full_name": name,
         "email": email,
@@ -120,6 +160,26 @@ def create_candidate(parsed_data: dict) -> str:
         "source": "upload"
     }
     
+    if not email:
+        return _insert_candidate(supabase, candidate_data)
+    
+    candidate_id = (known_candidates or {}).get(email)
+    if candidate_id:
+        print(f"Found existing candidate: {candidate_id}")
+        return candidate_id
+    
+    # Lookup + insert in one critical section: files of the same candidate
+    # processed concurrently must not both create it
+    with _candidate_lock(email):
+        # Check if exists
+        candidate_id = find_candidate_by_email(email)
+        if candidate_id:
+            print(f"Found existing candidate: {candidate_id}")
+            return candidate_id
+        
+        return _insert_candidate(supabase, candidate_data)
+
+def _insert_candidate(supabase, candidate_data: dict) -> str:
     res = supabase.table("candidates").insert(candidate_data).execute()
     if res.data:
         candidate_id = res.data[0]["id"]
@@ -1,14 +1,23 @@
 import json
 import re
 import os
+import asyncio
 import spacy
+import numpy as np
+import threading
 import warnings
 import unicodedata
 from difflib import SequenceMatcher
-from langdetect import detect, LangDetectException
+from concurrent.futures import ThreadPoolExecutor
+from rapidfuzz import fuzz, process as fuzz_process
+from scipy.optimize import linear_sum_assignment
+from collections import OrderedDict
+from langdetect import detect, DetectorFactory, LangDetectException
+from langdetect.detector_factory import init_factory
 from dotenv import load_dotenv
-from groq import Groq
 from services.linkedin_scraper import scrape_linkedin_profile
+from services import llm
+from services.cache import get_cache, sha256_hex
 
 # # Load environment variables
 # load_dotenv()
@@ -16,30 +25,367 @@ from services.linkedin_scraper import scrape_linkedin_profile
 # Suppress Spacy warnings
 warnings.filterwarnings("ignore")
 
+SPACY_MODEL = os.environ.get("SPACY_MODEL", "en_core_web_sm")
+# Components the merger never uses (it needs the parser for sentences and
+# tok2vec for similarity)
+SPACY_EXCLUDE = ["ner", "lemmatizer"]
+
+TRANSLATION_MODEL = "openai/gpt-oss-20b"
+
+TRANSLATION_SYSTEM_PROMPT = "You are a precise technical translator."
+
+TRANSLATION_PROMPT = """
+        Translate the following professional experience description into {lang_name}.
+        Rules:
+        1. Keep all technical terms, tool names, and acronyms (e.g., Python, SQL, ETL, ATS, Docker) exactly as they are.
+        2. Maintain the original semantic meaning and professional tone.
+        3. Do not summarize; translate sentence by sentence.
+        4. If theres a redundant sentence, remove it. 
+        5. If theres a sentence that contains only skills or technologies, remove it.
+        
+        Description to translate:
+        "{text}"
+        """
+
+TRANSLATION_BATCH_PROMPT = """
+        Translate the text of each of the following professional descriptions into {lang_name}.
+        Rules:
+        1. Keep all technical terms, tool names, and acronyms (e.g., Python, SQL, ETL, ATS, Docker) exactly as they are.
+        2. Maintain the original semantic meaning and professional tone.
+        3. Do not summarize; translate sentence by sentence.
+        4. If theres a redundant sentence, remove it. 
+        5. If theres a sentence that contains only skills or technologies, remove it.
+        6. Translate each item independently and return exactly one translation per id.
+        
+        Descriptions to translate (JSON):
+        {items}
+        """
+
+# Descriptions translated per batched call
+TRANSLATION_BATCH_MAX_ITEMS = int(os.environ.get("TRANSLATION_BATCH_MAX_ITEMS", 20))
+TRANSLATION_BATCH_MAX_CHARS = int(os.environ.get("TRANSLATION_BATCH_MAX_CHARS", 12000))
+
+# Max sections merged / translation batches sent at the same time
+ENRICH_CONCURRENCY = int(os.environ.get("ENRICH_CONCURRENCY", 4))
+
+# Sentence segmentation of descriptions: "rules" splits bullets/lines with
+# regexes (spaCy sentencizer for plain paragraphs), "spacy" uses the full pipeline
+SEGMENTATION_MODE = os.environ.get("SEGMENTATION_MODE", "rules")
+
+# Languages remembered (by text hash) per process
+LANG_CACHE_SIZE = int(os.environ.get("LANG_CACHE_SIZE", 4096))
+
+# Persistent translation cache (bump the version when the prompt/model changes)
+TRANSLATION_CACHE_VERSION = "1"
+TRANSLATION_CACHE_MAX_BYTES = int(os.environ.get("TRANSLATION_CACHE_MAX_MB", 50)) * 1024 * 1024
+TRANSLATION_CACHE_MAX_AGE = int(os.environ.get("TRANSLATION_CACHE_MAX_AGE_DAYS", 90)) * 24 * 3600
+
+# Similarity used to deduplicate description sentences: "spacy" (English word
+# vectors, descriptions translated to English first) or "embedding" (multilingual
+# sentence-transformers model, optional dependency: nothing is translated)
+DEDUP_BACKEND = os.environ.get("DEDUP_BACKEND", "spacy")
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+# "torch" or "onnx"; EMBEDDING_ONNX_FILE selects an exported (e.g. quantized) model file
+EMBEDDING_RUNTIME = os.environ.get("EMBEDDING_RUNTIME", "torch")
+EMBEDDING_ONNX_FILE = os.environ.get("EMBEDDING_ONNX_FILE")
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", 32))
+# Cosine similarity above which two sentences are the same
+EMBEDDING_THRESHOLD = float(os.environ.get("EMBEDDING_THRESHOLD", 0.80))
+EMBEDDING_CACHE_MAX_BYTES = int(os.environ.get("EMBEDDING_CACHE_MAX_MB", 200)) * 1024 * 1024
+EMBEDDING_CACHE_MAX_AGE = int(os.environ.get("EMBEDDING_CACHE_MAX_AGE_DAYS", 90)) * 24 * 3600
+
+TRANSLATION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "translation_response",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "translated_text": {
+                    "type": "string",
+                    "description": "The full translated content preserving technical terms."
+                }
+            },
+            "required": ["translated_text"],
+            "additionalProperties": False
+        },
+        "strict": True
+    }
+}
+
+# langdetect is random by default: seed it so a text always gets the same language
+DetectorFactory.seed = 0
+
+# Common English / French function words, for the English fast path
+_EN_STOPWORDS = frozenset(
+    "the and of to in for with on a an is are was were by as at from this that which "
+    "we i my our it be been have has using used into across over".split()
+)
+_FR_STOPWORDS = frozenset(
+    "le la les des du de et en un une pour avec sur dans par au aux est sont qui que "
+    "d l ce cette nous je mon notre".split()
+)
+_WORD_RE = re.compile(r"[a-z]+")
+# ASCII texts shorter than this (in words) without French function words are
+# English: langdetect is unreliable on them ("Data Engineer" -> "af")
+SHORT_TEXT_WORDS = 6
+
+
+def detect_language(text):
+    """
+    Language code of text ("en", "fr", ...), deterministic and memoized.
+
+    Short ASCII text without French function words, and ASCII text made of
+    English function words, is English without running langdetect; other
+    texts are detected once per (normalized) content.
+    """
+    if not text:
+        return "en"
+    normalized = " ".join(text.split())
+    if normalized.isascii():
+        words = _WORD_RE.findall(normalized.lower())
+        en = sum(1 for w in words if w in _EN_STOPWORDS)
+        fr = sum(1 for w in words if w in _FR_STOPWORDS)
+        if len(words) < SHORT_TEXT_WORDS and not fr:
+            return "en"
+        if en >= 3 and en >= 3 * fr:
+            return "en"
+    return _detect_language_cached(normalized)
+
+
+_lang_cache = OrderedDict()
+_lang_cache_lock = threading.Lock()
+
+
+def _detect_language_cached(text):
+    key = sha256_hex(text)
+    with _lang_cache_lock:
+        lang = _lang_cache.get(key)
+        if lang is not None:
+            _lang_cache.move_to_end(key)
+            return lang
+
+    try:
+        lang = detect(text)
+    except LangDetectException:
+        lang = "en"
+
+    with _lang_cache_lock:
+        _lang_cache[key] = lang
+        if len(_lang_cache) > LANG_CACHE_SIZE:
+            _lang_cache.popitem(last=False)
+    return lang
+
+
+_nlp = None
+_nlp_loaded = False
+_nlp_lock = threading.Lock()
+
+
+def get_nlp():
+    """
+    Process-wide spaCy pipeline, loaded on first use (thread-safe).
+    Returns None if the model is not installed.
+
+    The pipeline is only used for inference, which does not modify it, so the
+    same instance is shared by all requests and threads.
+    """
+    global _nlp, _nlp_loaded
+    if not _nlp_loaded:
+        with _nlp_lock:
+            if not _nlp_loaded:
+                print("Loading NLP models... (This may take a moment)")
+                try:
+                    # We ONLY need the English model now since we force everything to English
+                    _nlp = spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDE)
+                except OSError:
+                    print(f"Error: Spacy model '{SPACY_MODEL}' not found.")
+                    print(f"Please run: python -m spacy download {SPACY_MODEL}")
+                    _nlp = None
+                _nlp_loaded = True
+    return _nlp
+
+
+_sentencizer = None
+_sentencizer_lock = threading.Lock()
+
+_SEGMENT_SPLIT_RE = re.compile(r"\s*(?:\n|[•●▪■◦►✓])\s*")
+_LEADING_MARK_RE = re.compile(r"^[-*–]\s+")
+# End of sentence followed by a capital letter ("e.g. Python" is not an end)
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])(?<!\.[a-z]\.)\s+(?=[A-Z])")
+
+
+def get_sentencizer():
+    """Blank English pipeline with the rule-based sentencizer only (no model needed)."""
+    global _sentencizer
+    if _sentencizer is None:
+        with _sentencizer_lock:
+            if _sentencizer is None:
+                nlp = spacy.blank("en")
+                nlp.add_pipe("sentencizer")
+                _sentencizer = nlp
+    return _sentencizer
+
+
+def split_sentences(text):
+    """
+    Split a description into sentences.
+
+    Descriptions are almost always bullet or newline formatted: each bullet or
+    line is split on sentence ends with regexes. Only unstructured paragraphs
+    go through the spaCy sentencizer.
+    """
+    segments = [_LEADING_MARK_RE.sub("", segment) for segment in _SEGMENT_SPLIT_RE.split(text)]
+    segments = [segment for segment in segments if segment]
+    if len(segments) < 2:
+        return [sent.text.strip() for sent in get_sentencizer()(text).sents if sent.text.strip()]
+    return [sentence for segment in segments for sentence in _SENTENCE_END_RE.split(segment) if sentence]
+
+
+_embedder = None
+_embedder_loaded = False
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """
+    Process-wide sentence-transformers model of the embedding backend, loaded
+    on first use (thread-safe). Returns None if sentence-transformers is not
+    installed or the model cannot be loaded (the spaCy backend is used then).
+    """
+    global _embedder, _embedder_loaded
+    if not _embedder_loaded:
+        with _embedder_lock:
+            if not _embedder_loaded:
+                print(f"Loading embedding model '{EMBEDDING_MODEL}' ({EMBEDDING_RUNTIME})...")
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    kwargs = {"device": "cpu"}
+                    if EMBEDDING_RUNTIME == "onnx":
+                        kwargs["backend"] = "onnx"
+                        if EMBEDDING_ONNX_FILE:
+                            kwargs["model_kwargs"] = {"file_name": EMBEDDING_ONNX_FILE}
+                    _embedder = SentenceTransformer(EMBEDDING_MODEL, **kwargs)
+                except ImportError:
+                    print("WARNING: sentence-transformers is not installed, using spaCy similarity.")
+                    _embedder = None
+                except Exception as e:
+                    print(f"WARNING: Embedding model '{EMBEDDING_MODEL}' could not be loaded ({e}), using spaCy similarity.")
+                    _embedder = None
+                _embedder_loaded = True
+    return _embedder
+
+
+def _embedding_cache():
+    return get_cache("embeddings", max_bytes=EMBEDDING_CACHE_MAX_BYTES, max_age=EMBEDDING_CACHE_MAX_AGE)
+
+
+def _embedding_cache_key(text):
+    """Key of a sentence embedding: model (and exported file) + hash of the sentence."""
+    model = f"{EMBEDDING_MODEL}/{EMBEDDING_ONNX_FILE}" if EMBEDDING_RUNTIME == "onnx" else EMBEDDING_MODEL
+    return f"{model}:{sha256_hex(' '.join(text.split()))}"
+
+
+def embed_sentences(model, texts):
+    """
+    Unit-length embeddings of texts: (len(texts), dim) float32 matrix.
+
+    Embeddings are cached on disk by sentence hash; only the missing
+    sentences are encoded, in batches of EMBEDDING_BATCH_SIZE.
+    """
+    cache = _embedding_cache()
+    keys = [_embedding_cache_key(text) for text in texts]
+    vectors = [None] * len(texts)
+    missing = {}
+    for i, key in enumerate(keys):
+        cached = cache.get(key)
+        if cached is not None:
+            vectors[i] = np.frombuffer(cached, dtype=np.float32)
+        else:
+            missing.setdefault(key, []).append(i)
+
+    if missing:
+        encoded = model.encode(
+            [texts[rows[0]] for rows in missing.values()],
+            batch_size=EMBEDDING_BATCH_SIZE,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        )
+        for (key, rows), vector in zip(missing.items(), encoded):
+            vector = np.asarray(vector, dtype=np.float32)
+            cache.set(key, vector.tobytes())
+            for i in rows:
+                vectors[i] = vector
+
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.vstack(vectors)
+
+
+def warm_nlp():
+    """Load the spaCy pipeline (and run it once) in a background thread."""
+    def warm():
+        # langdetect loads its language profiles on first use
+        init_factory()
+        nlp = get_nlp()
+        if nlp:
+            nlp("Warm up the pipeline.")
+        get_sentencizer()
+        if DEDUP_BACKEND == "embedding":
+            get_embedder()
+
+    thread = threading.Thread(target=warm, name="nlp-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+TRANSLATION_BATCH_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "translation_batch_response",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "translations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "string"},
+                            "translated_text": {
+                                "type": "string",
+                                "description": "The full translated content preserving technical terms."
+                            }
+                        },
+                        "required": ["id", "translated_text"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["translations"],
+            "additionalProperties": False
+        },
+        "strict": True
+    }
+}
+
 class DescriptionMergerNLP:
     def __init__(self):
-        print("Loading NLP models... (This may take a moment)")
-        try:
-            # We ONLY need the English model now since we force everything to English
-            self.nlp_en = spacy.load("en_core_web_sm")
-        except OSError:
-            print("Error: Spacy model 'en_core_web_sm' not found.")
-            print("Please run: python -m spacy download en_core_web_sm")
-            self.nlp_en = None
-
-        # Initialize Groq Client
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
+        # Shared pipeline, loaded once per process (see get_nlp)
+        self.nlp_en = get_nlp()
+        # Multilingual embeddings compare sentences across languages, so no
+        # description needs to be translated with this backend
+        self.embedder = get_embedder() if DEDUP_BACKEND == "embedding" else None
+
+        # Shared Groq client (see services/llm.py)
+        if not llm.is_configured():
             print("WARNING: GROQ_API_KEY not found in environment.")
             self.groq_client = None
         else:
-            self.groq_client = Groq(api_key=api_key)
+            self.groq_client = llm.get_groq_client()
 
     def _detect_lang(self, text):
-        try:
-            return detect(text)
-        except LangDetectException:
-            return "en" 
+        return detect_language(text)
 
     def _get_spacy_model(self, lang_code):
         return self.nlp_en
@@ -49,72 +395,138 @@ class DescriptionMergerNLP:
         text = re.sub(r'^[\s\•\-\*]+', '', text)
         return " ".join(text.split()).lower()
 
+    @staticmethod
+    def _translation_cache_key(text, target_lang):
+        """Key of a translation: hash of the normalized text + target language."""
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        return f"v{TRANSLATION_CACHE_VERSION}:{target_lang}:{sha256_hex(normalized)}"
+
+    @staticmethod
+    def _translation_cache():
+        return get_cache("translations", max_bytes=TRANSLATION_CACHE_MAX_BYTES, max_age=TRANSLATION_CACHE_MAX_AGE)
+
     def _translate_description_groq(self, text, target_lang='en'):
         if not self.groq_client or not text:
             return text
 
+        cache = self._translation_cache()
+        key = self._translation_cache_key(text, target_lang)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
         lang_name = "English" 
         
-        prompt = f"""
-        Translate the following professional experience description into {lang_name}.
-        Rules:
-        1. Keep all technical terms, tool names, and acronyms (e.g., Python, SQL, ETL, ATS, Docker) exactly as they are.
-        2. Maintain the original semantic meaning and professional tone.
-        3. Do not summarize; translate sentence by sentence.
-        4. If theres a redundant sentence, remove it. 
-        5. If theres a sentence that contains only skills or technologies, remove it.
-        
-        Description to translate:
-        "{text}"
-        """
-
-        schema = {
-            "type": "json_schema",
-            "json_schema": {
-                "name": "translation_response",
-                "schema": {
-                    "type": "object",
-                    "properties": {
-                        "translated_text": {
-                            "type": "string",
-                            "description": "The full translated content preserving technical terms."
-                        }
-                    },
-                    "required": ["translated_text"],
-                    "additionalProperties": False
-                },
-                "strict": True
-            }
-        }
+        prompt = TRANSLATION_PROMPT.format(lang_name=lang_name, text=text)
 
         try:
-            completion = self.groq_client.chat.completions.create(
-                model="openai/gpt-oss-20b",
+            completion = llm.chat_completion(
+                model=TRANSLATION_MODEL,
                 messages=[
-                    {"role": "system", "content": "You are a precise technical translator."},
+                    {"role": "system", "content": TRANSLATION_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
-                response_format=schema,
+                response_format=TRANSLATION_RESPONSE_FORMAT,
                 temperature=0
             )
             
             resp_content = json.loads(completion.choices[0].message.content)
-            return resp_content.get("translated_text", text)
+            if "translated_text" not in resp_content:
+                return text
+            cache.set(key, resp_content["translated_text"])
+            return resp_content["translated_text"]
 
         except Exception as e:
             print(f"   [Groq Translation Error]: {e}")
             return text 
 
+    def translate_batch(self, texts, target_lang='en'):
+        """
+        Translate several descriptions with one structured-output call per
+        batch (TRANSLATION_BATCH_MAX_ITEMS / _CHARS) and store them in the
+        translation cache, where _translate_description_groq finds them.
+
+        Returns {text: translation} for the texts translated (or already cached).
+        Texts missing from a response are left to _translate_description_groq.
+        """
+        if not self.groq_client:
+            return {}
+
+        cache = self._translation_cache()
+        translations = {}
+        pending = []
+        for text in dict.fromkeys(t for t in texts if t):
+            cached = cache.get(self._translation_cache_key(text, target_lang))
+            if cached is not None:
+                translations[text] = cached
+            else:
+                pending.append(text)
+
+        batches = []
+        for text in pending:
+            batch = batches[-1] if batches else None
+            if (batch is None or len(batch) >= TRANSLATION_BATCH_MAX_ITEMS
+                    or sum(len(t) for t in batch) + len(text) > TRANSLATION_BATCH_MAX_CHARS):
+                batches.append([text])
+            else:
+                batch.append(text)
+
+        # Batches are independent: send them concurrently
+        if len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(batches), ENRICH_CONCURRENCY)) as executor:
+                results = list(executor.map(lambda batch: self._translate_one_batch(batch, target_lang), batches))
+        else:
+            results = [self._translate_one_batch(batch, target_lang) for batch in batches]
+
+        for result in results:
+            translations.update(result)
+        return translations
+
+    def _translate_one_batch(self, batch, target_lang):
+        """One batched translation call; returns {text: translation} and fills the cache."""
+        print(f"   [Translating {len(batch)} descriptions in one call] -> {target_lang}...")
+        items = [{"id": str(i), "text": text} for i, text in enumerate(batch)]
+        prompt = TRANSLATION_BATCH_PROMPT.format(
+            lang_name="English", items=json.dumps(items, ensure_ascii=False, indent=1)
+        )
+        try:
+            completion = llm.chat_completion(
+                model=TRANSLATION_MODEL,
+                messages=[
+                    {"role": "system", "content": TRANSLATION_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format=TRANSLATION_BATCH_RESPONSE_FORMAT,
+                temperature=0
+            )
+            resp_content = json.loads(completion.choices[0].message.content)
+        except Exception as e:
+            print(f"   [Groq Batch Translation Error]: {e}")
+            return {}
+
+        cache = self._translation_cache()
+        by_id = {item["id"]: item["translated_text"] for item in resp_content.get("translations", [])}
+        translations = {}
+        for i, text in enumerate(batch):
+            if str(i) in by_id:
+                translations[text] = by_id[str(i)]
+                cache.set(self._translation_cache_key(text, target_lang), by_id[str(i)])
+        return translations
+
     def _get_unique_sentences(self, text):
+        """Unique sentences of a description (text), skipping short and skills-only ones."""
         nlp = self.nlp_en
         if not text or not nlp: return []
         
-        doc = nlp(text)
-        unique_spans = []
+        if SEGMENTATION_MODE == "spacy":
+            sentences = [sent.text for sent in nlp(text).sents]
+        else:
+            sentences = split_sentences(text)
+        unique_sentences = []
         seen_content = set()
 
-        for sent in doc.sents:
-            clean_txt = self._clean_string(sent.text)
+        for sentence in sentences:
+            clean_txt = self._clean_string(sentence)
             
             if len(clean_txt) < 20: continue
             if clean_txt.lower().startswith("skills") or clean_txt.lower().startswith("technologies"):
@@ -122,51 +534,88 @@ class DescriptionMergerNLP:
 
             if clean_txt not in seen_content:
                 seen_content.add(clean_txt)
-                unique_spans.append(sent)
+                unique_sentences.append(sentence)
         
-        return unique_spans
+        return unique_sentences
 
-    def _is_semantically_present(self, candidate_span, existing_sentences_text, threshold=0.80):
-        cand_text = candidate_span.text.strip()
-        cand_clean = self._clean_string(cand_text)
-        
-        # 1. & 2. Iterator for String checks (Exact & Fuzzy)
-        for existing_text in existing_sentences_text:
-            exist_clean = self._clean_string(existing_text)
-            
+    def _sentence_vectors(self, texts):
+        """
+        Unit-length vectors of texts: (len(texts), dim) matrix, encoded in one
+        nlp.pipe pass, or by the embedding model with the embedding backend.
+        """
+        if self.embedder:
+            return embed_sentences(self.embedder, texts)
+        vectors = np.array([doc.vector for doc in self.nlp_en.pipe(texts)], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        # Same as Doc.similarity: a sentence without vector is similar to nothing
+        return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    def _is_semantically_present(self, cand_clean, existing_matchers, similarities, threshold=0.80):
+        """
+        True if the candidate sentence matches one of the existing sentences:
+        exact or fuzzy (> 0.80) match of the cleaned strings, or vector
+        similarity above threshold.
+
+        existing_matchers: one SequenceMatcher per existing sentence (cleaned
+        text as seq2, so its index is built once); similarities: the
+        precomputed cosine similarity with each existing sentence.
+        """
+        # Vector Similarity (precomputed, so checked first)
+        if len(similarities) and similarities.max() > threshold:
+            return True
+
+        for matcher in existing_matchers:
             # 1. Exact Match
-            if cand_clean == exist_clean:
-                # print(f"[Exact Match] '{cand_text}' == '{existing_text}'")
+            if cand_clean == matcher.b:
                 return True
 
-            # 2. Fuzzy String Match
-            text_similarity = SequenceMatcher(None, cand_clean, exist_clean).ratio()
-            if text_similarity > 0.80:
-                # print(f"   [Fuzzy Match: {text_similarity:.2f}] '{cand_text}' ~= '{existing_text}'")
+            # 2. Fuzzy String Match (the quick ratios are upper bounds of ratio)
+            matcher.set_seq1(cand_clean)
+            if matcher.real_quick_ratio() > 0.80 and matcher.quick_ratio() > 0.80 and matcher.ratio() > 0.80:
                 return True
-
-        # 3. Vector Similarity
-        nlp = self.nlp_en
-        if nlp:
-            doc1 = nlp(cand_text)
-            for existing_text in existing_sentences_text:
-                doc2 = nlp(existing_text)
-                sim_score = doc1.similarity(doc2)
-                if sim_score > threshold:
-                    # print(f"   [Sim: {sim_score:.2f}] MATCH FOUND (Dropped): '{cand_text}'")
-                    return True
         return False
 
+    def _new_linkedin_sentences(self, res_texts, li_texts, threshold=0.80):
+        """
+        LinkedIn sentences not already present in the resume sentences (or in
+        the LinkedIn sentences kept before them), in order.
+
+        All sentences are encoded once and compared through a single cosine
+        similarity matrix instead of parsing every pair again.
+        """
+        if not li_texts:
+            return []
+
+        texts = res_texts + li_texts
+        vectors = self._sentence_vectors(texts)
+        similarity = vectors[len(res_texts):] @ vectors.T
+        cleaned = [self._clean_string(t) for t in texts]
+
+        kept_rows = list(range(len(res_texts)))
+        matchers = [SequenceMatcher(None, "", cleaned[row]) for row in kept_rows]
+        new_sentences = []
+        for i, text in enumerate(li_texts):
+            row = len(res_texts) + i
+            if not self._is_semantically_present(cleaned[row], matchers, similarity[i, kept_rows], threshold):
+                kept_rows.append(row)
+                matchers.append(SequenceMatcher(None, "", cleaned[row]))
+                new_sentences.append(text)
+        return new_sentences
+
     def merge_text(self, resume_text, linkedin_text):
         if not self.nlp_en: 
             return resume_text or linkedin_text
 
-        res_lang = self._detect_lang(resume_text) if resume_text else 'en'
-        li_lang = self._detect_lang(linkedin_text) if linkedin_text else 'en'
-
         final_res_text = resume_text
         final_li_text = linkedin_text
 
+        if self.embedder:
+            # Sentences are compared in their own language
+            res_lang = li_lang = 'en'
+        else:
+            res_lang = self._detect_lang(resume_text) if resume_text else 'en'
+            li_lang = self._detect_lang(linkedin_text) if linkedin_text else 'en'
+
         if res_lang != 'en' and resume_text:
             print(f"   [Translating Resume Description] {res_lang} -> en...")
             final_res_text = self._translate_description_groq(resume_text, 'en')
@@ -175,27 +624,34 @@ class DescriptionMergerNLP:
             print(f"   [Translating LinkedIn Description] {li_lang} -> en...")
             final_li_text = self._translate_description_groq(linkedin_text, 'en')
 
-        res_spans = self._get_unique_sentences(final_res_text)
-        li_spans = self._get_unique_sentences(final_li_text)
+        res_sentences = self._get_unique_sentences(final_res_text)
+        li_sentences = self._get_unique_sentences(final_li_text)
         
-        print(f"   [Merge Text] Resume sentences: {len(res_spans)}, LinkedIn sentences: {len(li_spans)}")
-
-        final_sentences_text = []
+        print(f"   [Merge Text] Resume sentences: {len(res_sentences)}, LinkedIn sentences: {len(li_sentences)}")
 
         # BASE: Keep all English Resume sentences
-        for r_span in res_spans:
-            cleaned_r = re.sub(r'^[\s\•\-\*]+', '', r_span.text).strip()
-            final_sentences_text.append(cleaned_r)
+        final_sentences_text = [re.sub(r'^[\s\•\-\*]+', '', sentence).strip() for sentence in res_sentences]
+        li_sentences_text = [re.sub(r'^[\s\•\-\*]+', '', sentence).strip() for sentence in li_sentences]
 
         # ENRICH: Add English LinkedIn sentences if unique + TAG THEM
-        for l_span in li_spans:
-            l_text_clean = re.sub(r'^[\s\•\-\*]+', '', l_span.text).strip()
-            if not self._is_semantically_present(l_span, final_sentences_text):
-                # <--- TAGGING ADDED HERE --->
-                final_sentences_text.append(f"{l_text_clean} [Linkedin]")
+        threshold = EMBEDDING_THRESHOLD if self.embedder else 0.80
+        for l_text_clean in self._new_linkedin_sentences(final_sentences_text, li_sentences_text, threshold):
+            final_sentences_text.append(f"{l_text_clean} [Linkedin]")
         
         return "\n".join([f"• {s}" for s in final_sentences_text])
 
+# Removed from titles/institution names before matching
+NOISE_WORDS = ["internship", "stage", "apprenticeship", "alternance", "group", "groupe", "ltd", "s.a.", "official account"]
+_NOISE_RE = re.compile("|".join(re.escape(word) for word in NOISE_WORDS))
+# Minimum similarity (0-1) for two items to be the same
+MATCH_THRESHOLD = 0.50
+
+
+def _item_key(item):
+    """Hashable key of an array item (strings, or dicts/lists from scraped data)."""
+    return json.dumps(item, sort_keys=True) if isinstance(item, (dict, list)) else item
+
+
 class ProfileMerger:
     def __init__(self, resume_json, linkedin_json):
         # Data Loading
@@ -215,13 +671,11 @@ class ProfileMerger:
         s = unicodedata.normalize('NFD', s)
         s = "".join([c for c in s if unicodedata.category(c) != 'Mn'])
         s = s.lower()
-        noise_words = ["internship", "stage", "apprenticeship", "alternance", "group", "groupe", "ltd", "s.a.", "official account"]
-        for word in noise_words:
-            s = s.replace(word, "")
+        s = _NOISE_RE.sub("", s)
         s = re.sub(r'^[\s\•\-\*]+', '', s).strip()
         return re.sub(r'\W+', '', s)
 
-    def is_similar(self, a, b, threshold=0.50):
+    def is_similar(self, a, b, threshold=MATCH_THRESHOLD):
         if not a or not b: return False
         norm_a = self.normalize_str(a)
         norm_b = self.normalize_str(b)
@@ -235,41 +689,65 @@ class ProfileMerger:
             return f"{linkedin_val} [Linkedin]"
         return None
 
-    def merge_section(self, section_name, match_keys):
-        merged_list = []
+    def match_section(self, section_name, match_keys):
+        """
+        Pair resume items with LinkedIn items of a section.
+        Returns ([(resume_item, linkedin_item or None), ...], [unmatched LinkedIn items]).
+
+        Every value is normalized once and all pairs are scored in one matrix
+        (best similarity over match_keys, 0 below MATCH_THRESHOLD); the pairs
+        are then chosen with an optimal assignment (Hungarian algorithm)
+        instead of greedily in resume order.
+        """
         res_items = self.resume.get(section_name, [])
         li_items = self.linkedin.get(section_name, [])
 
         print(f"\n--- PROCESSING SECTION: {section_name} ---")
-        matched_li_indices = set()
+        if not res_items or not li_items:
+            return [(res_item, None) for res_item in res_items], list(li_items)
+
+        scores = np.zeros((len(res_items), len(li_items)))
+        for key in match_keys:
+            res_values = [item.get(key) for item in res_items]
+            li_values = [item.get(key) for item in li_items]
+            key_scores = fuzz_process.cdist(
+                [self.normalize_str(v) for v in res_values],
+                [self.normalize_str(v) for v in li_values],
+                scorer=fuzz.ratio,
+                score_cutoff=MATCH_THRESHOLD * 100
+            ) / 100.0
+            # Missing values never match (as in is_similar)
+            key_scores[[not v for v in res_values], :] = 0
+            key_scores[:, [not v for v in li_values]] = 0
+            # Scores are kept only strictly above the threshold
+            key_scores[key_scores <= MATCH_THRESHOLD] = 0
+            scores = np.maximum(scores, key_scores)
+
+        matches = {}
+        for i, j in zip(*linear_sum_assignment(scores, maximize=True)):
+            if scores[i, j] > 0:
+                matches[i] = j
+
+        pairs = []
+        for i, res_item in enumerate(res_items):
+            best_match = li_items[matches[i]] if i in matches else None
+            if best_match:
+                print(f"MATCH: {res_item.get(match_keys[0])} == {best_match.get(match_keys[0])}")
+            pairs.append((res_item, best_match))
 
-        for res_item in res_items:
-            best_match = None
-            best_match_idx = -1
-            best_score = 0
-            
-            for i, li_item in enumerate(li_items):
-                if i in matched_li_indices: continue
-                match_count = 0
-                sim_score = 0
-                for key in match_keys:
-                    val_a = res_item.get(key)
-                    val_b = li_item.get(key)
-                    if self.is_similar(val_a, val_b):
-                        match_count += 1
-                        sim_score = SequenceMatcher(None, self.normalize_str(val_a), self.normalize_str(val_b)).ratio()
-                
-                if match_count >= 1 and sim_score > best_score:
-                    best_score = sim_score
-                    best_match = li_item
-                    best_match_idx = i
+        matched_li_indices = set(matches.values())
+        unmatched = [li_item for i, li_item in enumerate(li_items) if i not in matched_li_indices]
+        return pairs, unmatched
 
+    def merge_section(self, section_name, match_keys, matches=None):
+        """Merge a section; matches is the match_section result (computed if not given)."""
+        pairs, unmatched = matches or self.match_section(section_name, match_keys)
+        merged_list = []
+
+        for res_item, best_match in pairs:
             final_item = res_item.copy()
 
             if best_match:
-                print(f"MATCH: {res_item.get(match_keys[0])} == {best_match.get(match_keys[0])}")
-                matched_li_indices.add(best_match_idx)
-                
                 # Merge Dates/URL (Tag if new)
                 for k in ['from_date', 'to_date', 'linkedin_url']:
                     if not final_item.get(k) and best_match.get(k):
@@ -284,27 +762,53 @@ class ProfileMerger:
             merged_list.append(final_item)
 
         # Add remaining (Unique) LinkedIn items
-        for i, li_item in enumerate(li_items):
-            if i not in matched_li_indices:
-                name = li_item.get(match_keys[0], "Unknown Item")
-                print(f"   -> Adding NEW item from LinkedIn: '{name}'")
-                
-                new_item = li_item.copy()
-                # Tag the Title/Name
-                title_key = 'position_title' if 'position_title' in new_item else 'project_name'
-                if title_key in new_item:
-                    new_item[title_key] = f"{new_item[title_key]} [Linkedin]"
-                
-                # Tag the description if it exists
-                if new_item.get('description'):
-                     # We still translate it to ensure English consistency
-                     trans_desc = self.nlp_merger._translate_description_groq(new_item['description'], 'en')
-                     new_item['description'] = f"{trans_desc} [Linkedin]"
-
-                merged_list.append(new_item)
+        for li_item in unmatched:
+            name = li_item.get(match_keys[0], "Unknown Item")
+            print(f"   -> Adding NEW item from LinkedIn: '{name}'")
+            
+            new_item = li_item.copy()
+            # Tag the Title/Name
+            title_key = 'position_title' if 'position_title' in new_item else 'project_name'
+            if title_key in new_item:
+                new_item[title_key] = f"{new_item[title_key]} [Linkedin]"
+            
+            # Tag the description if it exists
+            if new_item.get('description'):
+                 # We still translate it to ensure English consistency (not with embeddings)
+                 trans_desc = new_item['description']
+                 if not self.nlp_merger.embedder:
+                     trans_desc = self.nlp_merger._translate_description_groq(trans_desc, 'en')
+                 new_item['description'] = f"{trans_desc} [Linkedin]"
+
+            merged_list.append(new_item)
 
         return merged_list
 
+    def prefetch_translations(self, matches):
+        """
+        Translate every description the merge of these sections will need in
+        batched calls (see DescriptionMergerNLP.translate_batch), so
+        merge_section only reads translations from the cache.
+        """
+        nlp_merger = self.nlp_merger
+        if nlp_merger.embedder:
+            # Nothing is translated with the embedding backend
+            return
+        texts = []
+        for pairs, unmatched in matches.values():
+            # merge_text translates the non-English descriptions of matched items
+            if nlp_merger.nlp_en:
+                for res_item, li_item in pairs:
+                    if li_item and li_item.get('description'):
+                        for text in (res_item.get('description'), li_item['description']):
+                            if text and nlp_merger._detect_lang(text) != 'en':
+                                texts.append(text)
+            # New LinkedIn items are always translated
+            texts.extend(li_item['description'] for li_item in unmatched if li_item.get('description'))
+
+        if texts:
+            nlp_merger.translate_batch(texts, 'en')
+
     def process(self):
         # 1. Basic Info (Tag if from LinkedIn)
         self.output['linkedin_url'] = self.resume.get('linkedin_url') or self.linkedin.get('linkedin_url')
@@ -313,10 +817,22 @@ class ProfileMerger:
         self.output['about'] = self._enrich_field(self.resume.get('about'), self.linkedin.get('about'))
         self.output['open_to_work'] = self.linkedin.get('open_to_work', False)
 
-        # 2. Sections
-        self.output['experiences'] = self.merge_section('experiences', ['institution_name'])
-        self.output['educations'] = self.merge_section('educations', ['institution_name'])
-        self.output['projects'] = self.merge_section('projects', ['project_name'])
+        # 2. Sections (matched first so all translations are fetched in one batch)
+        sections = {
+            'experiences': ['institution_name'],
+            'educations': ['institution_name'],
+            'projects': ['project_name']
+        }
+        matches = {name: self.match_section(name, keys) for name, keys in sections.items()}
+        self.prefetch_translations(matches)
+        # Sections are independent: merge them concurrently
+        with ThreadPoolExecutor(max_workers=min(len(sections), ENRICH_CONCURRENCY)) as executor:
+            merged = {
+                name: executor.submit(self.merge_section, name, keys, matches[name])
+                for name, keys in sections.items()
+            }
+        for name, future in merged.items():
+            self.output[name] = future.result()
 
         # 3. Skills (Prefer LinkedIn structure usually)
         if self.linkedin.get('skills'):
@@ -330,8 +846,9 @@ class ProfileMerger:
             li_list = self.linkedin.get(k, [])
             # Combine unique items
             combined = list(res_list)
+            res_keys = {_item_key(item) for item in res_list}
             for item in li_list:
-                if item not in res_list:
+                if _item_key(item) not in res_keys:
                     combined.append(f"{item} [Linkedin]")
             self.output[k] = combined
 
@@ -355,9 +872,10 @@ async def enrich_candidate(resume_data: dict, linkedin_url: str = None, name: st
         print("No LinkedIn data found. Returning original resume.")
         return resume_data
 
-    # 2. Merge
-    merger = ProfileMerger(resume_data, linkedin_data)
-    merged_data = merger.process()
+    # 2. Merge (blocking NLP work and Groq calls: run outside the event loop)
+    def merge():
+        return ProfileMerger(resume_data, linkedin_data).process()
+    merged_data = await asyncio.to_thread(merge)
     
     print(f"Enrichment complete for {name}")
     return merged_data
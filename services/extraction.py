@@ -0,0 +1,138 @@
+"""
+Deterministic extraction of contact fields and date ranges from resume text.
+
+A single compiled regex scans the text once; the results are given to the
+LLM as hints and override the contact fields of its output.
+"""
+
+import re
+
+_MONTH = (
+    r"(?:jan(?:uary|vier)?|feb(?:ruary)?|f[ée]v(?:rier)?|mar(?:ch|s)?|apr(?:il)?|avr(?:il)?|"
+    r"may|mai|june?|juin|july?|juil(?:let)?|aug(?:ust)?|ao[uû]t?|sep(?:t(?:ember|embre)?)?|"
+    r"oct(?:ober|obre)?|nov(?:ember|embre)?|dec(?:ember)?|d[ée]c(?:embre)?)\.?"
+)
+_DATE = rf"(?:{_MONTH}\s+\d{{4}}|\d{{1,2}}/\d{{4}}|\d{{4}})"
+_OPEN_END = r"(?:present|current|now|today|ongoing|pr[ée]sent|aujourd'hui|en cours|actuel)"
+
+_FIELDS_RE = re.compile(
+    rf"""
+    (?P<email>[\w.+-]+@[\w-]+(?:\.[\w-]+)+)
+    |(?P<linkedin>(?:https?://)?(?:[\w-]+\.)?linkedin\.com/in/[\w%-]+/?)
+    |(?P<url>(?:https?://|www\.)[^\s,;()<>]+|(?:github|gitlab)\.com/[\w./-]+)
+    |(?P<date_range>(?P<date_from>{_DATE})\s*(?:[-–—]+|to|à|au)\s*(?P<date_to>{_DATE}|{_OPEN_END}))
+    |(?P<phone>(?<![\w/.,])\+?\(?\d[\d \t().-]{{6,}}\d(?![\w/]))
+    """,
+    re.IGNORECASE | re.VERBOSE
+)
+
+
+def extract_fields(text: str) -> dict:
+    """
+    Scan resume text once for emails, phones, LinkedIn/other URLs and date ranges.
+
+    Returns:
+        {"emails": [...], "phones": [...], "linkedin_url": str | None,
+         "urls": [...], "date_ranges": [{"text", "from", "to"}, ...]}
+    """
+    fields = {"emails": [], "phones": [], "linkedin_url": None, "urls": [], "date_ranges": []}
+    if not text:
+        return fields
+
+    for match in _FIELDS_RE.finditer(text):
+        kind = match.lastgroup if match.lastgroup not in ("date_from", "date_to") else "date_range"
+        value = match.group(kind).strip()
+
+        if kind == "email":
+            # Original casing kept (candidates are stored with it), deduplicated case-insensitively
+            if value.lower() not in (email.lower() for email in fields["emails"]):
+                fields["emails"].append(value)
+        elif kind == "linkedin":
+            if not fields["linkedin_url"]:
+                url = value.rstrip("/")
+                fields["linkedin_url"] = url if url.lower().startswith("http") else f"https://{url}"
+        elif kind == "url":
+            _append_unique(fields["urls"], value.rstrip("."))
+        elif kind == "date_range":
+            fields["date_ranges"].append({
+                "text": value,
+                "from": match.group("date_from"),
+                "to": match.group("date_to")
+            })
+        elif kind == "phone":
+            if _is_phone(value):
+                _append_unique(fields["phones"], " ".join(value.split()))
+
+    return fields
+
+
+def _is_phone(value):
+    """
+    Phone numbers have 8-15 digits and start with + or 0 (international or
+    national prefix) or use phone separators ("06.12...", "(555) 123-4567").
+    Space-separated digit groups (SIRET, ids) and year lists are rejected.
+    """
+    groups = re.findall(r"\d+", value)
+    if not 8 <= sum(len(group) for group in groups) <= 15:
+        return False
+    if all(len(group) == 4 and group[:2] in ("19", "20") for group in groups):
+        return False
+    return value[0] in "+0" or bool(re.search(r"[().-]", value))
+
+
+def _append_unique(values, value):
+    if value not in values:
+        values.append(value)
+
+
+def split_contacts(contacts) -> tuple:
+    """Return (email, phone) from a list of contact strings (first of each, or None)."""
+    email = None
+    phone = None
+    for contact in contacts or []:
+        fields = extract_fields(contact)
+        if not email and fields["emails"]:
+            email = fields["emails"][0]
+        if not phone and fields["phones"]:
+            phone = fields["phones"][0]
+    return email, phone
+
+
+def format_hints(fields: dict) -> str:
+    """Structured hint block added to the LLM prompt."""
+    lines = []
+    if fields["emails"] or fields["phones"]:
+        lines.append(f"- contacts (email/phone): {', '.join(fields['emails'] + fields['phones'])}")
+    if fields["linkedin_url"]:
+        lines.append(f"- linkedin_url: {fields['linkedin_url']}")
+    if fields["date_ranges"]:
+        lines.append(f"- date ranges found (from -> to): "
+                     f"{'; '.join(d['from'] + ' -> ' + d['to'] for d in fields['date_ranges'])}")
+    if not lines:
+        return ""
+    return (
+        "Pre-extracted fields (verified, use them as is; contacts and linkedin_url are filled "
+        "automatically, only add other contact entries such as websites):\n" + "\n".join(lines)
+    )
+
+
+def apply_extracted_fields(parsed: dict, fields: dict) -> dict:
+    """Fill/override the contact fields of an LLM result with the extracted ones."""
+    if not isinstance(parsed, dict):
+        return parsed
+
+    if fields["linkedin_url"]:
+        parsed["linkedin_url"] = fields["linkedin_url"]
+
+    if not (fields["emails"] or fields["phones"] or fields["urls"]):
+        return parsed
+
+    contacts = fields["emails"] + fields["phones"]
+    seen = {re.sub(r"\W", "", c.lower()) for c in contacts}
+    for contact in (parsed.get("contacts") or []) + fields["urls"]:
+        key = re.sub(r"\W", "", str(contact).lower())
+        if key and key not in seen and "linkedincomin" not in key:
+            seen.add(key)
+            contacts.append(contact)
+    parsed["contacts"] = contacts
+    return parsed
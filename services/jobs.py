@@ -0,0 +1,274 @@
+"""
+Background job queue for bulk resume uploads.
+
+Files are stored in a local SQLite database so queued work survives a restart
+and is shared by all gunicorn workers. Each worker process runs a small pool
+of threads that claim queued files one at a time and process them with the
+handler registered by the app.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+JOBS_DB_PATH = os.environ.get("JOBS_DB_PATH", "/tmp/resume_jobs.db")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 1.0))
+# A file stuck in 'processing' for longer than this (worker crash/restart) is queued again
+JOB_STALE_AFTER = int(os.environ.get("JOB_STALE_AFTER", 900))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 2))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    job_offer_id TEXT,
+    created_at REAL NOT NULL,
+    total INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    content BLOB,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_job_files_status ON job_files(status, id);
+CREATE INDEX IF NOT EXISTS idx_job_files_job ON job_files(job_id, position);
+"""
+
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+_workers = []
+_workers_pid = None
+_workers_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def _connect():
+    """Open a connection to the jobs database (one per operation/thread)."""
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    if JOBS_DB_PATH not in _initialized_paths:
+        with _init_lock:
+            if JOBS_DB_PATH not in _initialized_paths:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _initialized_paths.add(JOBS_DB_PATH)
+    return conn
+
+
+# =============================================================================
+# SUBMIT / STATUS
+# =============================================================================
+
+def create_job(files, job_offer_id=None) -> str:
+    """
+    Queue a batch of files.
+
+    Args:
+        files: list of (filename, content, error) tuples. Files with an error
+            (invalid type, too large...) are recorded as failed right away.
+        job_offer_id: Optional job offer the resumes apply to
+
+    Returns:
+        str: Job ID
+    """
+    job_id = uuid.uuid4().hex
+    now = time.time()
+
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "INSERT INTO jobs (id, job_offer_id, created_at, total) VALUES (?, ?, ?, ?)",
+            (job_id, job_offer_id, now, len(files))
+        )
+        for position, (filename, content, error) in enumerate(files):
+            if error:
+                conn.execute(
+                    "INSERT INTO job_files (job_id, position, filename, status, error, finished_at) "
+                    "VALUES (?, ?, ?, 'failed', ?, ?)",
+                    (job_id, position, filename, error, now)
+                )
+            else:
+                conn.execute(
+                    "INSERT INTO job_files (job_id, position, filename, content, status) "
+                    "VALUES (?, ?, ?, ?, 'queued')",
+                    (job_id, position, filename, sqlite3.Binary(content))
+                )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    print(f"Job {job_id} queued with {len(files)} files")
+    _wakeup.set()
+    return job_id
+
+
+def get_job(job_id: str) -> dict | None:
+    """
+    Return the status of a job with per-file progress.
+    Finished files are also listed in 'data'/'errors' (same shape as the
+    synchronous upload response).
+    """
+    conn = _connect()
+    try:
+        job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not job:
+            return None
+        rows = conn.execute(
+            "SELECT filename, status, result, error FROM job_files WHERE job_id = ? ORDER BY position",
+            (job_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    counts = {'queued': 0, 'processing': 0, 'done': 0, 'failed': 0}
+    files = []
+    data = []
+    errors = []
+    for row in rows:
+        counts[row['status']] += 1
+        entry = {'filename': row['filename'], 'status': row['status']}
+        if row['status'] == 'done':
+            result = json.loads(row['result'])
+            entry['result'] = result
+            data.append(result)
+        elif row['status'] == 'failed':
+            entry['error'] = row['error']
+            errors.append({'filename': row['filename'], 'error': row['error']})
+        files.append(entry)
+
+    finished = counts['done'] + counts['failed']
+    if finished == job['total']:
+        status = 'completed'
+    elif counts['processing'] or finished:
+        status = 'processing'
+    else:
+        status = 'queued'
+
+    return {
+        'job_id': job_id,
+        'status': status,
+        'job_offer_id': job['job_offer_id'],
+        'created_at': job['created_at'],
+        'total': job['total'],
+        'counts': counts,
+        'progress': round(finished / job['total'], 3) if job['total'] else 1.0,
+        'files': files,
+        'data': data,
+        'errors': errors
+    }
+
+
+# =============================================================================
+# WORKERS
+# =============================================================================
+
+def _claim_next(conn):
+    """Atomically mark the oldest queued file as processing and return it."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Requeue files abandoned by a dead worker, give up after JOB_MAX_ATTEMPTS
+        conn.execute(
+            "UPDATE job_files SET status = 'failed', error = 'Processing interrupted', "
+            "content = NULL, finished_at = ? "
+            "WHERE status = 'processing' AND claimed_at < ? AND attempts >= ?",
+            (now, now - JOB_STALE_AFTER, JOB_MAX_ATTEMPTS)
+        )
+        conn.execute(
+            "UPDATE job_files SET status = 'queued' WHERE status = 'processing' AND claimed_at < ?",
+            (now - JOB_STALE_AFTER,)
+        )
+
+        row = conn.execute(
+            "SELECT f.id, f.filename, f.content, j.job_offer_id "
+            "FROM job_files f JOIN jobs j ON j.id = f.job_id "
+            "WHERE f.status = 'queued' ORDER BY f.id LIMIT 1"
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE job_files SET status = 'processing', claimed_at = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (now, row['id'])
+            )
+        conn.execute("COMMIT")
+        return row
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def process_next(handler) -> bool:
+    """
+    Process one queued file with handler(content, filename, job_offer_id).
+    Returns False when the queue is empty.
+    """
+    conn = _connect()
+    try:
+        row = _claim_next(conn)
+        if not row:
+            return False
+
+        try:
+            result = handler(bytes(row['content']), row['filename'], row['job_offer_id'])
+            conn.execute(
+                "UPDATE job_files SET status = 'done', result = ?, content = NULL, finished_at = ? "
+                "WHERE id = ?",
+                (json.dumps(result, default=str), time.time(), row['id'])
+            )
+        except Exception as e:
+            print(f"Error processing {row['filename']}: {e}")
+            conn.execute(
+                "UPDATE job_files SET status = 'failed', error = ?, content = NULL, finished_at = ? "
+                "WHERE id = ?",
+                (str(e), time.time(), row['id'])
+            )
+        return True
+    finally:
+        conn.close()
+
+
+def _worker_loop(handler):
+    while True:
+        try:
+            if process_next(handler):
+                continue
+        except Exception as e:
+            print(f"Job worker error: {e}")
+        _wakeup.wait(JOB_POLL_INTERVAL)
+        _wakeup.clear()
+
+
+def start_workers(handler, count: int = None):
+    """
+    Start the background worker threads of this process (idempotent).
+    Called lazily so that gunicorn workers each get their own pool after fork.
+    """
+    global _workers, _workers_pid
+    count = count or JOB_WORKERS
+
+    with _workers_lock:
+        if _workers_pid == os.getpid() and _workers:
+            return
+        _workers = []
+        for i in range(count):
+            t = threading.Thread(target=_worker_loop, args=(handler,), name=f"job-worker-{i}", daemon=True)
+            t.start()
+            _workers.append(t)
+        _workers_pid = os.getpid()
+        print(f"Started {count} job workers (pid {_workers_pid})")
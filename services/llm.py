@@ -0,0 +1,179 @@
+"""
+Shared Groq client layer.
+
+All LLM calls go through the clients created here, so connections (and TLS
+sessions) are kept alive and reused across requests and threads instead of
+being set up again for every call.
+"""
+
+import os
+import time
+import asyncio
+import threading
+import weakref
+import httpx
+from groq import Groq, AsyncGroq, RateLimitError, APIConnectionError, InternalServerError
+from services import ratelimit
+
+GROQ_TIMEOUT = float(os.environ.get("GROQ_TIMEOUT", 120))
+GROQ_MAX_CONNECTIONS = int(os.environ.get("GROQ_MAX_CONNECTIONS", 20))
+GROQ_KEEPALIVE_EXPIRY = float(os.environ.get("GROQ_KEEPALIVE_EXPIRY", 60))
+
+# Client-side rate limiting shared by all workers (see services/ratelimit.py)
+GROQ_RATE_LIMITER = os.environ.get("GROQ_RATE_LIMITER", "1") == "1"
+# Longest a call waits for budget before being sent anyway (seconds)
+GROQ_RATE_LIMIT_MAX_WAIT = float(os.environ.get("GROQ_RATE_LIMIT_MAX_WAIT", 120))
+# 429s tolerated per call before the error is raised
+GROQ_RATE_LIMIT_RETRIES = int(os.environ.get("GROQ_RATE_LIMIT_RETRIES", 5))
+# Retries of connection errors and 5xx
+GROQ_MAX_RETRIES = int(os.environ.get("GROQ_MAX_RETRIES", 2))
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+# AsyncGroq clients are bound to the event loop they are used in,
+# and the app creates a new loop per request: keep one per loop.
+_async_clients = weakref.WeakKeyDictionary()
+_async_lock = threading.Lock()
+
+
+def is_configured() -> bool:
+    """True if a Groq API key is available."""
+    return bool(os.getenv("GROQ_API_KEY"))
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=GROQ_MAX_CONNECTIONS,
+        max_keepalive_connections=GROQ_MAX_CONNECTIONS,
+        keepalive_expiry=GROQ_KEEPALIVE_EXPIRY
+    )
+
+
+def _sdk_retries():
+    # With the rate limiter, retries (incl. 429s) are done by chat_completion
+    return 0 if GROQ_RATE_LIMITER else GROQ_MAX_RETRIES
+
+
+def get_groq_client() -> Groq:
+    """
+    Process-wide Groq client, created on first use (thread-safe).
+    Re-created after a fork so gunicorn workers never share connections.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = Groq(
+                    api_key=os.getenv("GROQ_API_KEY"),
+                    timeout=GROQ_TIMEOUT,
+                    max_retries=_sdk_retries(),
+                    http_client=httpx.Client(limits=_limits(), timeout=GROQ_TIMEOUT)
+                )
+                _client_pid = os.getpid()
+    return _client
+
+
+def get_async_groq_client() -> AsyncGroq:
+    """AsyncGroq client for the running event loop (created on first use)."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        with _async_lock:
+            client = _async_clients.get(loop)
+            if client is None:
+                client = AsyncGroq(
+                    api_key=os.getenv("GROQ_API_KEY"),
+                    timeout=GROQ_TIMEOUT,
+                    max_retries=_sdk_retries(),
+                    http_client=httpx.AsyncClient(limits=_limits(), timeout=GROQ_TIMEOUT)
+                )
+                _async_clients[loop] = client
+    return client
+
+
+def chat_completion(**kwargs):
+    """
+    client.chat.completions.create through the shared client.
+
+    With GROQ_RATE_LIMITER, the call waits for the model's shared budget and
+    is queued again (instead of failing) when Groq answers 429.
+    """
+    if not GROQ_RATE_LIMITER:
+        return get_groq_client().chat.completions.create(**kwargs)
+
+    call = _RateLimitedCall(kwargs)
+    while True:
+        wait = call.reserve()
+        if wait:
+            time.sleep(wait)
+            continue
+        try:
+            raw = get_groq_client().chat.completions.with_raw_response.create(**kwargs)
+        except Exception as e:
+            delay = call.retry_delay(e)
+            if delay:
+                time.sleep(delay)
+            continue
+        ratelimit.record_headers(call.model, raw.headers)
+        return raw.parse()
+
+
+async def async_chat_completion(**kwargs):
+    """Async variant of chat_completion."""
+    if not GROQ_RATE_LIMITER:
+        return await get_async_groq_client().chat.completions.create(**kwargs)
+
+    call = _RateLimitedCall(kwargs)
+    while True:
+        wait = call.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+            continue
+        try:
+            raw = await get_async_groq_client().chat.completions.with_raw_response.create(**kwargs)
+        except Exception as e:
+            delay = call.retry_delay(e)
+            if delay:
+                await asyncio.sleep(delay)
+            continue
+        ratelimit.record_headers(call.model, raw.headers)
+        # AsyncAPIResponse.parse is a coroutine
+        return await raw.parse()
+
+
+class _RateLimitedCall:
+    """Wait/retry bookkeeping of one call, shared by the sync and async wrappers."""
+
+    def __init__(self, kwargs):
+        self.model = kwargs.get("model")
+        self.tokens = ratelimit.estimate_request_tokens(kwargs)
+        self.deadline = time.time() + GROQ_RATE_LIMIT_MAX_WAIT
+        self.rate_limited = 0
+        self.failures = 0
+
+    def reserve(self) -> float:
+        """Seconds to wait before sending (0: budget reserved, send now)."""
+        remaining = max(self.deadline - time.time(), 0)
+        wait = min(ratelimit.reserve(self.model, self.tokens, force=remaining == 0), remaining)
+        if wait:
+            print(f"[Groq {self.model}] waiting {wait:.1f}s for rate-limit budget")
+        return wait
+
+    def retry_delay(self, error) -> float:
+        """Seconds before retrying after error, or re-raise it when it should not be retried."""
+        if isinstance(error, RateLimitError):
+            self.rate_limited += 1
+            retry_after = ratelimit.record_rate_limited(self.model, error.response.headers)
+            if self.rate_limited > GROQ_RATE_LIMIT_RETRIES:
+                raise error
+            # Waited even past GROQ_RATE_LIMIT_MAX_WAIT (reserve() no longer
+            # waits then): retrying at once would only get more 429s
+            return retry_after
+        if isinstance(error, (APIConnectionError, InternalServerError)):
+            self.failures += 1
+            if self.failures > GROQ_MAX_RETRIES:
+                raise error
+            return 0.5 * 2 ** (self.failures - 1)
+        raise error
@@ -0,0 +1,134 @@
+"""
+Client-side rate limiting of Groq calls, shared by all gunicorn workers.
+
+Groq returns the remaining request/token budget of each model in the
+x-ratelimit-* response headers. They are stored in a small JSON file
+(guarded by an fcntl lock) so every process and thread sees the same budget:
+a call that does not fit in it waits for the reset instead of being sent and
+failing with a 429. A 429 (retry-after) blocks the model for every process.
+"""
+
+import os
+import re
+import json
+import time
+import fcntl
+
+RATE_LIMIT_STATE_PATH = os.environ.get("GROQ_RATE_LIMIT_STATE_PATH", "/tmp/groq_ratelimit.json")
+# Completion tokens assumed when the call does not set max_completion_tokens
+RATE_LIMIT_OUTPUT_TOKENS = int(os.environ.get("GROQ_RATE_LIMIT_OUTPUT_TOKENS", 1500))
+# Default wait after a 429 without a retry-after header (seconds)
+RATE_LIMIT_DEFAULT_RETRY_AFTER = float(os.environ.get("GROQ_RATE_LIMIT_DEFAULT_RETRY_AFTER", 5))
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value) -> float:
+    """Seconds of a Groq reset header ("7.66s", "2m59.56s", "120ms") or a plain number."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(str(value))
+    if not parts:
+        return None
+    return sum(float(amount) * _UNITS[unit] for amount, unit in parts)
+
+
+def _header_int(headers, name):
+    try:
+        return int(float(headers.get(name)))
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_request_tokens(kwargs) -> int:
+    """Approximate tokens of a chat completion call (prompt + completion)."""
+    prompt_chars = sum(len(str(m.get("content") or "")) for m in kwargs.get("messages", []))
+    output = kwargs.get("max_completion_tokens") or kwargs.get("max_tokens") or RATE_LIMIT_OUTPUT_TOKENS
+    return prompt_chars // 4 + output
+
+
+class _State:
+    """The shared state file, locked for the duration of the with block."""
+
+    def __enter__(self):
+        self.file = open(RATE_LIMIT_STATE_PATH, "a+")
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        self.file.seek(0)
+        try:
+            self.data = json.loads(self.file.read() or "{}")
+        except ValueError:
+            self.data = {}
+        return self.data
+
+    def __exit__(self, *exc):
+        try:
+            self.file.seek(0)
+            self.file.truncate()
+            json.dump(self.data, self.file)
+            self.file.flush()
+        finally:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+
+
+def reserve(model, tokens, force=False) -> float:
+    """
+    Take one request and `tokens` tokens from the model's budget.
+
+    Returns 0 when reserved, otherwise the number of seconds to wait before
+    trying again (nothing is reserved). With force, the budget is taken even
+    if it is exhausted.
+    """
+    now = time.time()
+    with _State() as data:
+        budget = data.setdefault(model, {})
+
+        # Budgets past their reset time are unknown again until the next response
+        for kind in ("tokens", "requests"):
+            if budget.get(f"{kind}_reset", 0) <= now:
+                budget[kind] = None
+
+        wait = max(budget.get("blocked_until", 0) - now, 0)
+        if budget["tokens"] is not None and budget["tokens"] < tokens:
+            wait = max(wait, budget["tokens_reset"] - now)
+        if budget["requests"] is not None and budget["requests"] < 1:
+            wait = max(wait, budget["requests_reset"] - now)
+
+        if wait > 0 and not force:
+            return wait
+
+        if budget["tokens"] is not None:
+            budget["tokens"] -= tokens
+        if budget["requests"] is not None:
+            budget["requests"] -= 1
+        return 0
+
+
+def record_headers(model, headers):
+    """Update the model's budget from the x-ratelimit-* headers of a response."""
+    now = time.time()
+    with _State() as data:
+        budget = data.setdefault(model, {})
+        for kind in ("tokens", "requests"):
+            remaining = _header_int(headers, f"x-ratelimit-remaining-{kind}")
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            if remaining is not None and reset is not None:
+                budget[kind] = remaining
+                budget[f"{kind}_reset"] = now + reset
+
+
+def record_rate_limited(model, headers) -> float:
+    """Block the model for every process after a 429. Returns the wait in seconds."""
+    retry_after = parse_duration((headers or {}).get("retry-after"))
+    if retry_after is None:
+        retry_after = RATE_LIMIT_DEFAULT_RETRY_AFTER
+    with _State() as data:
+        budget = data.setdefault(model, {})
+        budget["blocked_until"] = max(budget.get("blocked_until", 0), time.time() + retry_after)
+    print(f"[Groq {model}] rate limited, calls queued for {retry_after:.1f}s")
+    return retry_after
@@ -1,11 +1,10 @@
 import os
 import json
 import re
-from groq import Groq
 from PyPDF2 import PdfReader
 import os
 import json
-from groq import Groq, BadRequestError
+from groq import BadRequestError
 
 
 # --------------------------------------------------
@@ -15,10 +14,22 @@ from groq import Groq, BadRequestError
 
 import os
 import json
+import math
+import time
 import base64
+import threading
+from collections import deque
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import fitz  # PyMuPDF
-from groq import Groq
+from services.cache import get_cache, sha256_hex
+from services.llm import chat_completion
+from services.utils import percentile
+from services.schema import compile_validator, repair, load_json_output, TopLevelMemberParser
+from services.extraction import extract_fields, format_hints, apply_extracted_fields
+from services.compaction import compact_text, estimate_tokens
 
 # from dotenv import load_dotenv
 
@@ -31,35 +42,101 @@ from groq import Groq
 NVIDIA_API_KEY = os.environ.get("NVIDIA_API_KEY")
 INVOKE_URL = "https://ai.api.nvidia.com/v1/cv/baidu/paddleocr"
 
+# OCR HTTP settings: pages OCR'd in parallel, per-call timeout (seconds), retries with backoff
+OCR_CONCURRENCY = int(os.environ.get("OCR_CONCURRENCY", 4))
+OCR_TIMEOUT = float(os.environ.get("OCR_TIMEOUT", 60))
+OCR_MAX_RETRIES = int(os.environ.get("OCR_MAX_RETRIES", 3))
+
+# Page rendering for OCR: zoom picked from the page size to hit a pixel budget
+# (3.9 MP ~ 200 dpi on A4), grayscale, JPEG for scanned pages and PNG otherwise
+OCR_TARGET_MEGAPIXELS = float(os.environ.get("OCR_TARGET_MEGAPIXELS", 3.9))
+OCR_MIN_ZOOM = float(os.environ.get("OCR_MIN_ZOOM", 1.5))
+OCR_MAX_ZOOM = float(os.environ.get("OCR_MAX_ZOOM", 3.0))
+OCR_IMAGE_FORMAT = os.environ.get("OCR_IMAGE_FORMAT", "auto")  # auto | png | jpeg
+OCR_GRAYSCALE = os.environ.get("OCR_GRAYSCALE", "1") == "1"
+OCR_JPEG_QUALITY = int(os.environ.get("OCR_JPEG_QUALITY", 85))
+
+# Several pages are sent in one OCR request, up to these limits (body size is ~4/3 of the images)
+OCR_BATCH_MAX_PAGES = int(os.environ.get("OCR_BATCH_MAX_PAGES", 4))
+OCR_BATCH_MAX_BYTES = int(os.environ.get("OCR_BATCH_MAX_BYTES", 3 * 1024 * 1024))
+
+# OCR results cached by rendered image hash + render settings (LRU by size)
+OCR_CACHE_MAX_BYTES = int(os.environ.get("OCR_CACHE_MAX_MB", 100)) * 1024 * 1024
+OCR_CACHE_MAX_AGE = int(os.environ.get("OCR_CACHE_MAX_AGE_DAYS", 30)) * 24 * 3600
+
+# Parsed resumes cached by file content hash (bump the version when the prompt/schema changes)
+PARSE_CACHE_VERSION = "4"
+PARSE_CACHE_MAX_BYTES = int(os.environ.get("PARSE_CACHE_MAX_MB", 200)) * 1024 * 1024
+PARSE_CACHE_MAX_AGE = int(os.environ.get("PARSE_CACHE_MAX_AGE_DAYS", 30)) * 24 * 3600
+
 # --------------------------------------------------
 # 1. PDF/IMAGE → TEXT (NVIDIA OCR)
 # --------------------------------------------------
 
+_ocr_session = None
+_ocr_session_lock = threading.Lock()
+
 def get_headers():
     return {
         "Authorization": f"Bearer {NVIDIA_API_KEY}",
         "Accept": "application/json"
     }
 
-def ocr_image(image_bytes, ext):
-    """Send image bytes to NVIDIA PaddleOCR and return JSON."""
-    try:
-        image_b64 = base64.b64encode(image_bytes).decode()
-        # Handle extension for data URI
+def get_ocr_session():
+    """Shared keep-alive HTTP session for OCR calls (retries 429/5xx with backoff)."""
+    global _ocr_session
+    if _ocr_session is None:
+        with _ocr_session_lock:
+            if _ocr_session is None:
+                retry = Retry(
+                    total=OCR_MAX_RETRIES,
+                    backoff_factor=1,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=frozenset(["POST"]),
+                    respect_retry_after_header=True,
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(OCR_CONCURRENCY, 10), max_retries=retry)
+                session = requests.Session()
+                session.headers.update(get_headers())
+                session.mount("https://", adapter)
+                _ocr_session = session
+    return _ocr_session
+
+def build_ocr_payload(images):
+    """
+    JSON request body for PaddleOCR from a list of (image_bytes, ext), built
+    directly as bytes so the base64 images are not copied again by str
+    formatting and json.dumps.
+    """
+    parts = [b'{"input":[']
+    for i, (image_bytes, ext) in enumerate(images):
         ext_str = ext[1:] if ext.startswith('.') else ext
-        
-        payload = {
-            "input": [
-                {
-                    "type": "image_url",
-                    "url": f"data:image/{ext_str};base64,{image_b64}"
-                }
-            ]
-        }
+        if i:
+            parts.append(b',')
+        parts += [
+            b'{"type":"image_url","url":"data:image/',
+            ext_str.encode(),
+            b';base64,',
+            base64.b64encode(image_bytes),
+            b'"}'
+        ]
+    parts.append(b']}')
+    return b"".join(parts)
+
+def _post_ocr(images):
+    """Send one PaddleOCR request for the given images and return its JSON."""
+    try:
+        payload = build_ocr_payload(images)
 
-        print(f"Image sent to NVIDIA PaddleOCR API")
+        print(f"{len(images)} image(s) sent to NVIDIA PaddleOCR API ({len(payload) / 1024:.0f} KB)")
 
-        response = requests.post(INVOKE_URL, headers=get_headers(), json=payload)
+        response = get_ocr_session().post(
+            INVOKE_URL,
+            data=payload,
+            headers={"Content-Type": "application/json"},
+            timeout=(10, OCR_TIMEOUT)
+        )
 
         if response.status_code == 200:
             print(f"response received")
@@ -70,6 +147,88 @@ def ocr_image(image_bytes, ext):
     except Exception as e:
         return {"error": str(e)}
 
+def ocr_image(image_bytes, ext):
+    """Send image bytes to NVIDIA PaddleOCR and return JSON."""
+    return _post_ocr([(image_bytes, ext)])
+
+def ocr_images(images):
+    """
+    OCR several images in a single request.
+
+    Returns one result per image (same shape as ocr_image). If the response
+    cannot be mapped back to the images (error, unexpected page count), each
+    image is OCR'd on its own instead.
+    """
+    if len(images) == 1:
+        return [ocr_image(*images[0])]
+
+    result = _post_ocr(images)
+    pages = result.get("data") if isinstance(result, dict) else None
+    if isinstance(pages, list) and len(pages) == len(images):
+        return [{"data": [page]} for page in pages]
+
+    print(f"Batched OCR failed ({result.get('error', 'unexpected page count')}), falling back to one request per page")
+    return [ocr_image(image_bytes, ext) for image_bytes, ext in images]
+
+def batch_ocr_jobs(jobs):
+    """Group OCR jobs (..., image_bytes, ext) into batches within the page/size limits."""
+    batches = []
+    current = []
+    current_size = 0
+    for job in jobs:
+        size = len(job[-2]) * 4 // 3
+        if current and (len(current) >= OCR_BATCH_MAX_PAGES or current_size + size > OCR_BATCH_MAX_BYTES):
+            batches.append(current)
+            current = []
+            current_size = 0
+        current.append(job)
+        current_size += size
+    if current:
+        batches.append(current)
+    return batches
+
+def ocr_cache_key(image_bytes, ext):
+    """Cache key of an OCR result: rendered image hash + the settings it was rendered with."""
+    settings = f"{ext}|{OCR_TARGET_MEGAPIXELS}|{OCR_MIN_ZOOM}|{OCR_MAX_ZOOM}|{OCR_GRAYSCALE}|{OCR_JPEG_QUALITY}"
+    return f"{sha256_hex(image_bytes)}:{sha256_hex(settings)[:16]}"
+
+def ocr_pages(images):
+    """
+    OCR a list of (image_bytes, ext) and return one result per image, in order.
+
+    Cached results are reused; the remaining images are grouped into batched
+    requests that are sent concurrently (OCR_CONCURRENCY). Successful results
+    are added to the cache.
+    """
+    cache = get_cache("ocr_results", max_bytes=OCR_CACHE_MAX_BYTES, max_age=OCR_CACHE_MAX_AGE)
+    results = [None] * len(images)
+
+    pending = []  # (index, cache key, image_bytes, ext)
+    for index, (image_bytes, ext) in enumerate(images):
+        key = ocr_cache_key(image_bytes, ext)
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"OCR result found in cache for image {index + 1}")
+            results[index] = cached
+        else:
+            pending.append((index, key, image_bytes, ext))
+
+    if pending:
+        batches = batch_ocr_jobs(pending)
+        workers = max(1, min(OCR_CONCURRENCY, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            batch_results = executor.map(
+                lambda batch: ocr_images([(image_bytes, ext) for _, _, image_bytes, ext in batch]),
+                batches
+            )
+            for batch, ocr_results in zip(batches, batch_results):
+                for (index, key, _, _), ocr_result in zip(batch, ocr_results):
+                    results[index] = ocr_result
+                    if "error" not in ocr_result:
+                        cache.set(key, ocr_result)
+
+    return results
+
 def extract_text_from_ocr_result(ocr_result):
     """Extract only text lines from NVIDIA PaddleOCR result."""
     text_lines = []
@@ -96,12 +255,47 @@ def extract_text_from_ocr_result(ocr_result):
     return "\n".join(text_lines)
 
 
+def render_page_for_ocr(page):
+    """
+    Rasterize a PDF page for OCR.
+
+    The zoom is chosen from the page size so the image has about
+    OCR_TARGET_MEGAPIXELS pixels (clamped to OCR_MIN_ZOOM..OCR_MAX_ZOOM).
+    In "auto" format, pages containing images (scans, photos) are encoded as
+    JPEG and pages made of vector text as PNG, which is smaller for them.
+
+    Returns (image_bytes, ext).
+    """
+    rect = page.rect
+    zoom = math.sqrt(OCR_TARGET_MEGAPIXELS * 1_000_000 / max(rect.width * rect.height, 1))
+    zoom = max(OCR_MIN_ZOOM, min(OCR_MAX_ZOOM, zoom))
+
+    colorspace = fitz.csGRAY if OCR_GRAYSCALE else fitz.csRGB
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+
+    fmt = OCR_IMAGE_FORMAT
+    if fmt == "auto":
+        fmt = "jpeg" if page.get_images() else "png"
+
+    if fmt == "jpeg":
+        return pix.tobytes("jpeg", jpg_quality=OCR_JPEG_QUALITY), "jpeg"
+    return pix.tobytes("png"), "png"
+
 def process_pdf(file_path):
-    """Extract text from PDF; OCR pages with no text."""
+    """Extract text from PDF; OCR pages with no text.
+
+    file_path can also be the raw PDF bytes (e.g. a ZIP member read in memory).
+    Pages are rendered one by one, then OCR'd through ocr_pages (cache,
+    batched and concurrent requests); results keep the page order.
+    """
     results = []
     try:
-        doc = fitz.open(file_path)
+        if isinstance(file_path, (bytes, bytearray)):
+            doc = fitz.open(stream=file_path, filetype="pdf")
+        else:
+            doc = fitz.open(file_path)
 
+        ocr_jobs = []  # (index in results, image bytes, ext)
         for page_num, page in enumerate(doc):
             print(f"--- Processing Page {page_num + 1} ---")
 
@@ -118,30 +312,25 @@ def process_pdf(file_path):
             else:
                 print("No text found (or < 1000 chars) — performing OCR.")
                 
-                # --- FIX START ---
-                # 2.0 = 2x zoom (approx 144 dpi). 
-                # 3.0 = 3x zoom (approx 216 dpi). Recommended for Resume OCR.
-                zoom_x = 3.0  
-                zoom_y = 3.0
-                mat = fitz.Matrix(zoom_x, zoom_y)
-                
-                # Pass the matrix to get_pixmap
-                pix = page.get_pixmap(matrix=mat)
-                # --- FIX END ---
-
-                image_bytes = pix.tobytes("png")
+                image_bytes, image_ext = render_page_for_ocr(page)
                 
                 # Optional: Check size to ensure you don't hit NVIDIA API limits (e.g., 5MB or 10MB)
-                print(f"Image size: {len(image_bytes) / 1024 / 1024:.2f} MB")
+                print(f"Image size: {len(image_bytes) / 1024 / 1024:.2f} MB ({image_ext})")
                 
-                ocr_result = ocr_image(image_bytes, "png")
-
+                ocr_jobs.append((len(results), image_bytes, image_ext))
                 results.append({
                     "page": page_num + 1,
                     "type": "ocr",
-                    "content": ocr_result
+                    "content": None
                 })
 
+        # PyMuPDF is not thread-safe, so pages are rendered above and only
+        # the OCR requests run in parallel
+        if ocr_jobs:
+            ocr_results = ocr_pages([(image_bytes, ext) for _, image_bytes, ext in ocr_jobs])
+            for (index, _, _), ocr_result in zip(ocr_jobs, ocr_results):
+                results[index]["content"] = ocr_result
+
         return results
     except Exception as e:
         print(f"Error processing PDF: {e}")
@@ -173,6 +362,21 @@ def process_file(file_path):
     else:
         return {"error": "Unsupported file type"}
 
+def process_file_bytes(file_bytes, ext):
+    """Same as process_file, for content already held in memory."""
+    ext = ext.lower()
+    if not ext.startswith('.'):
+        ext = f".{ext}"
+
+    if ext == ".pdf":
+        result = process_pdf(file_bytes)
+        return format_ocr_output(result)
+    elif ext in [".jpg", ".jpeg", ".png", ".bmp"]:
+        result = ocr_pages([(file_bytes, ext)])[0]
+        return format_ocr_output(result)
+    else:
+        return {"error": "Unsupported file type"}
+
 def format_ocr_output(result):
     """Format OCR results into plain text only."""
     output_text = ""
@@ -198,7 +402,8 @@ def format_ocr_output(result):
 
 # Wrapper to maintain compatibility
 def pdf_to_text_minimal_tokens(pdf_path):
-    return process_file(pdf_path)
+    text = process_file(pdf_path)
+    return compact_text(text, PARSE_MAX_INPUT_TOKENS) if isinstance(text, str) else text
 
 def sanitize_json_output(data):
     """
@@ -225,168 +430,405 @@ def sanitize_json_output(data):
 # --------------------------------------------------
 # 2. GROQ RESUME PARSER WITH AUTO-RETRY
 # --------------------------------------------------
-def parse_resume_with_groq(resume_text_content):
-    if not resume_text_content:
-        return None
+PARSE_MODEL = "openai/gpt-oss-120b"
+
+# Tiered parsing: models tried in order, the next one is used only when the
+# result fails local validation. e.g. "openai/gpt-oss-20b,openai/gpt-oss-120b"
+PARSE_MODEL_TIERS = [m.strip() for m in os.environ.get("PARSE_MODEL_TIERS", PARSE_MODEL).split(",") if m.strip()]
 
-    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+_parse_stats = {}
+_parse_stats_lock = threading.Lock()
 
-    # Define the schema (Same as your original)
-    json_schema = {
-        "name": "resume_extraction_schema",
+# Built once at import, shared by every parsing call
+RESUME_JSON_SCHEMA = {
+    "name": "resume_extraction_schema",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "linkedin_url": {"type": ["string", "null"]},
+            "name": {"type": "string"},
+            "location": {"type": ["string", "null"]},
+            "about": {"type": ["string", "null"]},
+            "open_to_work": {"type": ["boolean", "null"]},
+            "experiences": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "position_title": {"type": "string"},
+                        "institution_name": {"type": "string"},
+                        "linkedin_url": {"type": ["string", "null"]},
+                        "from_date": {"type": ["string", "null"]},
+                        "to_date": {"type": ["string", "null"]},
+                        "duration": {"type": ["string", "null"]},
+                        "location": {"type": ["string", "null"]},
+                        "description": {"type": ["string", "null"]}
+                    },
+                    "required": [
+                        "position_title", "institution_name", "linkedin_url",
+                        "from_date", "to_date", "duration", "location", "description"
+                    ],
+                    "additionalProperties": False
+                }
+            },
+            "educations": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "degree": {"type": "string"},
+                        "institution_name": {"type": "string"},
+                        "linkedin_url": {"type": ["string", "null"]},
+                        "from_date": {"type": ["string", "null"]},
+                        "to_date": {"type": ["string", "null"]},
+                        "duration": {"type": ["string", "null"]},
+                        "location": {"type": ["string", "null"]},
+                        "description": {"type": ["string", "null"]}
+                    },
+                    "required": [
+                        "degree", "institution_name", "linkedin_url",
+                        "from_date", "to_date", "duration", "location", "description"
+                    ],
+                    "additionalProperties": False
+                }
+            },
+            "skills": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "category": {"type": "string"},
+                        "items": {
+                            "type": "array",
+                            "items": {"type": "string"}
+                        }
+                    },
+                    "required": ["category", "items"],
+                    "additionalProperties": False
+                }
+            },
+            "projects": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "project_name": {"type": "string"},
+                        "role": {"type": ["string", "null"]},
+                        "from_date": {"type": ["string", "null"]},
+                        "to_date": {"type": ["string", "null"]},
+                        "duration": {"type": ["string", "null"]},
+                        "technologies": {
+                            "type": "array",
+                            "items": {"type": "string"}
+                        },
+                        "description": {"type": ["string", "null"]},
+                        "url": {"type": ["string", "null"]}
+                    },
+                    "required": [
+                        "project_name", "role", "from_date", "to_date", 
+                        "duration", "technologies", "description", "url"
+                    ],
+                    "additionalProperties": False
+                }
+            },
+            "interests": {"type": "array", "items": {"type": "string"}},
+            "accomplishments": {"type": "array", "items": {"type": "string"}},
+            "contacts": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": [
+            "linkedin_url", "name", "location", "about", "open_to_work",
+            "experiences", "educations", "skills", "projects",
+            "interests", "accomplishments", "contacts"
+        ],
+        "additionalProperties": False
+    }
+}
+
+validate_resume_json = compile_validator(RESUME_JSON_SCHEMA)
+
+RESUME_SYSTEM_PROMPT = (
+    "You are an expert Resume Parsing API designed to output strict JSON data.\n"
+    "Your goal is to extract information accurately while sanitizing the formatting.\n\n"
+
+    "### CORE INSTRUCTIONS:\n"
+    "1. **Extraction:** Extract information accurately. Do not summarize or hallucinate.\n"
+    "2. **Missing Data:** If a field is not present, return `null`.\n"
+    "3. **Dates:** Keep dates in their original format (e.g., 'Jan 2020', '2020-01').\n\n"
+
+    "### SKILLS EXTRACTION STRATEGY (CRITICAL):\n"
+    "The schema requires an array of objects, where each object has a 'category' and a list of 'items'.\n"
+    "1. **Identify:** Scan the *entire* resume (Summary, Experience, Projects, Skills section) for technical and professional skills.\n"
+    "2. **Categorize:** You MUST group these skills into logical categories (e.g., 'Languages', 'Frameworks', 'Databases', 'Cloud', 'Soft Skills').\n"
+    "3. **Infer:** If the resume lists skills in a single comma-separated list without headers, analyze the items and create your own categories to group them logically.\n"
+    "4. **Format:** Ensure every skill is a distinct string item within its specific category list.\n\n"
+
+    "### FORMATTING & CLEANING RULES:\n"
+    "1. **Plain Text Only:** The output must be pure JSON strings. STRICTLY FORBIDDEN: HTML tags (e.g., <br>, <p>, <li>, <b>).\n"
+    "2. **Line Breaks:** You must detect where a new sentence or bullet point begins.\n"
+    "   - REPLACE all visual bullet points (•, -, *) with a standard newline character (`\\n`).\n"
+    "   - REPLACE all HTML break tags (<br>) with a standard newline character (`\\n`).\n"
+    "3. **Whitespace:** Trim excessive whitespace.\n"
+)
+
+# Optional section-chunked parsing of long resumes: each section is parsed
+# concurrently with a sub-schema, then merged into RESUME_JSON_SCHEMA
+PARSE_SECTION_CHUNKING = os.environ.get("PARSE_SECTION_CHUNKING", "0") == "1"
+PARSE_CHUNK_MIN_CHARS = int(os.environ.get("PARSE_CHUNK_MIN_CHARS", 6000))
+
+# Approximate token budget of the (compacted) resume text sent to the model
+PARSE_MAX_INPUT_TOKENS = int(os.environ.get("PARSE_MAX_INPUT_TOKENS", 8000))
+
+# Top-level fields produced by each section's sub-schema
+SECTION_FIELDS = {
+    "header": ["linkedin_url", "name", "location", "about", "open_to_work",
+               "interests", "accomplishments", "contacts"],
+    "experience": ["experiences"],
+    "education": ["educations"],
+    "projects": ["projects"],
+    "skills": ["skills"],
+}
+
+# Heading lines that start a section (English / French); "header" collects
+# the top of the document and the miscellaneous sections
+SECTION_HEADINGS = [
+    ("experience", re.compile(
+        r"^((professional |work |relevant )?(experiences?|employment( history)?|work history|career history)"
+        r"|exp[ée]riences?( professionnelles?)?|parcours professionnel)$", re.IGNORECASE)),
+    ("education", re.compile(
+        r"^(education|academic background|academics|formations?( acad[ée]miques?)?|[ée]tudes|dipl[ôo]mes?|cursus)$",
+        re.IGNORECASE)),
+    ("projects", re.compile(
+        r"^((academic |personal |key |selected )?projects?|projets?( acad[ée]miques| personnels)?|research)$",
+        re.IGNORECASE)),
+    ("skills", re.compile(
+        r"^((technical |key |core )?skills|comp[ée]tences( techniques)?|technologies|tech stack)$",
+        re.IGNORECASE)),
+    ("header", re.compile(
+        r"^(summary|profile|about( me)?|profil|r[ée]sum[ée]|interests|hobbies|centres d.int[ée]r[êe]t|loisirs|"
+        r"certifications?|awards|honors|achievements|accomplishments|languages|langues|contact)$",
+        re.IGNORECASE)),
+]
+
+
+def _sub_schema(section):
+    props = RESUME_JSON_SCHEMA["schema"]["properties"]
+    fields = SECTION_FIELDS[section]
+    return {
+        "name": f"resume_{section}_schema",
         "strict": True,
         "schema": {
             "type": "object",
-            "properties": {
-                "linkedin_url": {"type": ["string", "null"]},
-                "name": {"type": "string"},
-                "location": {"type": ["string", "null"]},
-                "about": {"type": ["string", "null"]},
-                "open_to_work": {"type": ["boolean", "null"]},
-                "experiences": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "position_title": {"type": "string"},
-                            "institution_name": {"type": "string"},
-                            "linkedin_url": {"type": ["string", "null"]},
-                            "from_date": {"type": ["string", "null"]},
-                            "to_date": {"type": ["string", "null"]},
-                            "duration": {"type": ["string", "null"]},
-                            "location": {"type": ["string", "null"]},
-                            "description": {"type": ["string", "null"]}
-                        },
-                        "required": [
-                            "position_title", "institution_name", "linkedin_url",
-                            "from_date", "to_date", "duration", "location", "description"
-                        ],
-                        "additionalProperties": False
-                    }
-                },
-                "educations": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "degree": {"type": "string"},
-                            "institution_name": {"type": "string"},
-                            "linkedin_url": {"type": ["string", "null"]},
-                            "from_date": {"type": ["string", "null"]},
-                            "to_date": {"type": ["string", "null"]},
-                            "duration": {"type": ["string", "null"]},
-                            "location": {"type": ["string", "null"]},
-                            "description": {"type": ["string", "null"]}
-                        },
-                        "required": [
-                            "degree", "institution_name", "linkedin_url",
-                            "from_date", "to_date", "duration", "location", "description"
-                        ],
-                        "additionalProperties": False
-                    }
-                },
-                "skills": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "category": {"type": "string"},
-                            "items": {
-                                "type": "array",
-                                "items": {"type": "string"}
-                            }
-                        },
-                        "required": ["category", "items"],
-                        "additionalProperties": False
-                    }
-                },
-                "projects": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "project_name": {"type": "string"},
-                            "role": {"type": ["string", "null"]},
-                            "from_date": {"type": ["string", "null"]},
-                            "to_date": {"type": ["string", "null"]},
-                            "duration": {"type": ["string", "null"]},
-                            "technologies": {
-                                "type": "array",
-                                "items": {"type": "string"}
-                            },
-                            "description": {"type": ["string", "null"]},
-                            "url": {"type": ["string", "null"]}
-                        },
-                        "required": [
-                            "project_name", "role", "from_date", "to_date", 
-                            "duration", "technologies", "description", "url"
-                        ],
-                        "additionalProperties": False
-                    }
-                },
-                "interests": {"type": "array", "items": {"type": "string"}},
-                "accomplishments": {"type": "array", "items": {"type": "string"}},
-                "contacts": {"type": "array", "items": {"type": "string"}}
-            },
-            "required": [
-                "linkedin_url", "name", "location", "about", "open_to_work",
-                "experiences", "educations", "skills", "projects",
-                "interests", "accomplishments", "contacts"
-            ],
+            "properties": {f: props[f] for f in fields},
+            "required": fields,
             "additionalProperties": False
         }
     }
 
-    # Initialize messages
-    # ... inside parse_resume_with_groq ...
+SECTION_SCHEMAS = {section: _sub_schema(section) for section in SECTION_FIELDS}
 
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are an expert Resume Parsing API designed to output strict JSON data.\n"
-                "Your goal is to extract information accurately while sanitizing the formatting.\n\n"
-                
-                "### CORE INSTRUCTIONS:\n"
-                "1. **Extraction:** Extract information accurately. Do not summarize or hallucinate.\n"
-                "2. **Missing Data:** If a field is not present, return `null`.\n"
-                "3. **Dates:** Keep dates in their original format (e.g., 'Jan 2020', '2020-01').\n\n"
-
-                "### SKILLS EXTRACTION STRATEGY (CRITICAL):\n"
-                "The schema requires an array of objects, where each object has a 'category' and a list of 'items'.\n"
-                "1. **Identify:** Scan the *entire* resume (Summary, Experience, Projects, Skills section) for technical and professional skills.\n"
-                "2. **Categorize:** You MUST group these skills into logical categories (e.g., 'Languages', 'Frameworks', 'Databases', 'Cloud', 'Soft Skills').\n"
-                "3. **Infer:** If the resume lists skills in a single comma-separated list without headers, analyze the items and create your own categories to group them logically.\n"
-                "4. **Format:** Ensure every skill is a distinct string item within its specific category list.\n\n"
-
-                "### FORMATTING & CLEANING RULES:\n"
-                "1. **Plain Text Only:** The output must be pure JSON strings. STRICTLY FORBIDDEN: HTML tags (e.g., <br>, <p>, <li>, <b>).\n"
-                "2. **Line Breaks:** You must detect where a new sentence or bullet point begins.\n"
-                "   - REPLACE all visual bullet points (•, -, *) with a standard newline character (`\\n`).\n"
-                "   - REPLACE all HTML break tags (<br>) with a standard newline character (`\\n`).\n"
-                "3. **Whitespace:** Trim excessive whitespace.\n"
-            )
-        },
-        {
-            "role": "user",
-            "content": f"Parse the following resume content into the defined JSON schema:\n\n{resume_text_content}"
-        }
+_validators = {RESUME_JSON_SCHEMA["name"]: validate_resume_json}
+
+def _validator(schema):
+    validate = _validators.get(schema["name"])
+    if validate is None:
+        validate = _validators[schema["name"]] = compile_validator(schema)
+    return validate
+
+def repair_resume_json(failed_generation, schema=RESUME_JSON_SCHEMA):
+    """
+    Deterministic repair of a generation rejected by Groq's schema validation.
+    Returns the repaired resume dict, or None if it is not usable JSON.
+    """
+    data = load_json_output(failed_generation)
+    if not isinstance(data, dict):
+        return None
+    repaired = repair(data, schema)
+    errors = _validator(schema)(repaired)
+    if errors:
+        print(f"Local repair incomplete: {errors[:3]}")
+        return None
+    return repaired
+
+def _record_tier(model, seconds, outcome):
+    """Record one parsing attempt for get_parse_stats (outcome: accepted/escalated/failed)."""
+    with _parse_stats_lock:
+        stats = _parse_stats.setdefault(model, {
+            "calls": 0, "accepted": 0, "escalated": 0, "failed": 0,
+            "latencies": deque(maxlen=500)
+        })
+        stats["calls"] += 1
+        stats[outcome] += 1
+        stats["latencies"].append(seconds)
+
+def get_parse_stats():
+    """Per-model call counts, escalation rate and p50/p95 latency (this process)."""
+    with _parse_stats_lock:
+        report = {}
+        for model, stats in _parse_stats.items():
+            latencies = list(stats["latencies"])
+            report[model] = {
+                "calls": stats["calls"],
+                "accepted": stats["accepted"],
+                "escalated": stats["escalated"],
+                "failed": stats["failed"],
+                "escalation_rate": round(stats["escalated"] / stats["calls"], 3) if stats["calls"] else 0.0,
+                "p50_seconds": round(percentile(latencies, 50), 3) if latencies else None,
+                "p95_seconds": round(percentile(latencies, 95), 3) if latencies else None
+            }
+        return {"tiers": PARSE_MODEL_TIERS, "models": report}
+
+def is_acceptable_parse(data):
+    """Local check that a parsed resume is usable: schema-valid, with a name and some experience or education."""
+    if not isinstance(data, dict) or validate_resume_json(data):
+        return False
+    if not (data.get("name") or "").strip():
+        return False
+    return bool(data.get("experiences") or data.get("educations"))
+
+def split_resume_sections(text):
+    """
+    Split resume text on section heading lines.
+    Returns {section: text}; text before the first heading goes to "header".
+    """
+    sections = {}
+    current = "header"
+    for line in text.splitlines():
+        candidate = line.strip().strip(":").strip()
+        if 2 < len(candidate) < 40:
+            for section, pattern in SECTION_HEADINGS:
+                if pattern.match(candidate):
+                    current = section
+                    break
+        sections.setdefault(current, []).append(line)
+    return {section: "\n".join(lines).strip() for section, lines in sections.items() if "".join(lines).strip()}
+
+def parse_resume_with_groq(resume_text_content, fields=None):
+    """
+    Parse resume text into RESUME_JSON_SCHEMA.
+
+    Models in PARSE_MODEL_TIERS are tried in order; a result that fails
+    is_acceptable_parse is escalated to the next (larger) model. The last
+    tier's result is returned as is.
+
+    With PARSE_SECTION_CHUNKING, long resumes are split into sections that
+    are parsed concurrently (see _parse_by_sections).
+
+    Contacts, LinkedIn URL and date ranges are extracted locally (fields, see
+    services.extraction.extract_fields): they are given to the model as hints
+    and override its contact fields.
+
+    The text is compacted (page furniture, broken lines, whitespace) and cut
+    to PARSE_MAX_INPUT_TOKENS before being sent (see services.compaction).
+    """
+    if not resume_text_content:
+        return None
+
+    if fields is None:
+        fields = extract_fields(resume_text_content)
+    hints = format_hints(fields)
+    resume_text_content = compact_text(resume_text_content, PARSE_MAX_INPUT_TOKENS)
+
+    result = None
+    if PARSE_SECTION_CHUNKING and len(resume_text_content) >= PARSE_CHUNK_MIN_CHARS:
+        result = _parse_by_sections(resume_text_content, hints)
+        if result is None:
+            print("Section parsing unavailable, parsing the whole document.")
+
+    if result is None:
+        result = _parse_tiered(resume_text_content, is_acceptable_parse, hints=hints)
+    return apply_extracted_fields(result, fields)
+
+def _parse_by_sections(resume_text_content, hints=""):
+    """
+    Parse each section with its sub-schema in parallel and merge the parts.
+    Returns None when the text has too few recognizable sections or a section
+    fails, so the caller can fall back to a whole-document parse.
+    """
+    sections = split_resume_sections(resume_text_content)
+    if len(sections) < 2 or "header" not in sections:
+        return None
+
+    print(f"Parsing {len(sections)} sections concurrently: {', '.join(sections)}")
+
+    def parse_section(item):
+        section, text = item
+        schema = SECTION_SCHEMAS[section]
+        return _parse_tiered(
+            text,
+            lambda data: isinstance(data, dict) and not _validator(schema)(data),
+            schema=schema,
+            instruction=f"Parse the following resume section ({section}) into the defined JSON schema",
+            hints=hints if section == "header" else ""
+        )
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(sections)) as executor:
+            parts = list(executor.map(parse_section, sections.items()))
+    except Exception as e:
+        print(f"Section parsing failed: {e}")
+        return None
+
+    if any(part is None for part in parts):
+        return None
+
+    merged = repair({}, RESUME_JSON_SCHEMA)
+    for part in parts:
+        merged.update(part)
+    return merged
+
+def _parse_tiered(text, accept, **parse_kwargs):
+    """Run _parse_with_model over PARSE_MODEL_TIERS until accept(result) (last tier always accepted)."""
+    result = None
+    for i, model in enumerate(PARSE_MODEL_TIERS):
+        is_last = i == len(PARSE_MODEL_TIERS) - 1
+        start = time.perf_counter()
+        try:
+            # Lower tiers get a single attempt: escalating is cheaper than retrying
+            result = _parse_with_model(text, model, max_retries=3 if is_last else 1, **parse_kwargs)
+        except Exception:
+            _record_tier(model, time.perf_counter() - start, "failed")
+            if is_last:
+                raise
+            print(f"[{model}] failed, escalating to {PARSE_MODEL_TIERS[i + 1]}")
+            continue
+        elapsed = time.perf_counter() - start
+
+        if is_last or accept(result):
+            _record_tier(model, elapsed, "accepted" if result else "failed")
+            print(f"[{model}] parsed in {elapsed:.2f}s")
+            return result
+
+        _record_tier(model, elapsed, "escalated")
+        print(f"[{model}] result failed validation after {elapsed:.2f}s, escalating to {PARSE_MODEL_TIERS[i + 1]}")
+
+    return result
+
+def _parse_messages(text, instruction, hints=""):
+    content = f"{instruction}:\n\n{text}"
+    if hints:
+        content += f"\n\n{hints}"
+    return [
+        {"role": "system", "content": RESUME_SYSTEM_PROMPT},
+        {"role": "user", "content": content}
     ]
 
-    max_retries = 3
+def _parse_with_model(resume_text_content, model, max_retries=3, schema=RESUME_JSON_SCHEMA,
+                      instruction="Parse the following resume content into the defined JSON schema",
+                      hints=""):
+    """One model tier: call Groq, retrying when the output fails schema validation."""
+    messages = _parse_messages(resume_text_content, instruction, hints)
+
     attempt = 0
 
     while attempt < max_retries:
         try:
-            print(f"--- Groq Parsing Attempt {attempt + 1} ---")
+            print(f"--- Groq Parsing Attempt {attempt + 1} ({model}) ---")
             
-            completion = client.chat.completions.create(
-                model="openai/gpt-oss-120b",
+            completion = chat_completion(
+                model=model,
                 messages=messages,
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": json_schema
-                }
+                response_format={"type": "json_schema", "json_schema": schema}
             )
             
             # Load the raw JSON
@@ -408,11 +850,20 @@ def parse_resume_with_groq(resume_text_content):
                 
                 print(f"Validation failed: {error_msg}")
                 
+                # Most failures are a missing key or a wrong type: fix them locally
+                repaired = repair_resume_json(failed_json, schema)
+                if repaired is not None:
+                    print("Failed generation repaired locally.")
+                    return sanitize_json_output(repaired)
+                
+                # Last resort: ask the model to regenerate
                 # Append the error details to messages to give the LLM context
                 # It acts like a conversation: User -> Assistant (Failed) -> User (Correction Request)
                 
                 # Note: We cannot append the 'failed' assistant message directly 
                 # because it wasn't valid, so we tell the user what happened.
+                # Only the latest correction request is kept so the prompt does not grow.
+                del messages[2:]
                 messages.append({
                     "role": "user", 
                     "content": (
@@ -435,3 +886,152 @@ def parse_resume_with_groq(resume_text_content):
 
     print("Max retries exceeded.")
     return None
+
+
+# --------------------------------------------------
+# 3. FILE → STRUCTURED JSON (CONTENT-HASH CACHE)
+# --------------------------------------------------
+def parse_resume_bytes(file_bytes, ext, on_fields=None):
+    """
+    Extract text from a resume file and parse it with Groq.
+
+    Results are cached by the SHA-256 of the file content, so a byte-identical
+    re-upload skips both OCR and the LLM call.
+
+    on_fields, if given, is called with the locally extracted fields
+    (contacts, LinkedIn URL, date ranges) before the LLM call, so callers can
+    start work that only needs those (e.g. candidate lookup by email).
+
+    Returns the parsed resume dict, or None if the AI parsing failed.
+    Raises ValueError if no text could be extracted.
+    """
+    cache, key = _parsed_cache_entry(file_bytes)
+
+    cached = cache.get(key)
+    if cached is not None:
+        print(f"Parsed resume found in cache ({key[:16]}...)")
+        return cached
+
+    resume_text = _extract_text(file_bytes, ext)
+
+    fields = extract_fields(resume_text)
+    if on_fields:
+        on_fields(fields)
+
+    parsed_data = parse_resume_with_groq(resume_text, fields=fields)
+    if parsed_data:
+        cache.set(key, parsed_data)
+    return parsed_data
+
+
+def _parsed_cache_entry(file_bytes):
+    """(cache, key) of the parsed result of a file."""
+    cache = get_cache("parsed_resumes", max_bytes=PARSE_CACHE_MAX_BYTES, max_age=PARSE_CACHE_MAX_AGE)
+    return cache, f"v{PARSE_CACHE_VERSION}:{sha256_hex(file_bytes)}"
+
+
+def _extract_text(file_bytes, ext):
+    resume_text = process_file_bytes(file_bytes, ext)
+    if not resume_text or isinstance(resume_text, dict) or resume_text.startswith("Error:"):
+        raise ValueError(f"Failed to extract text: {resume_text}")
+    return resume_text
+
+
+# --------------------------------------------------
+# 4. STREAMED PARSING (PARTIAL RESULTS)
+# --------------------------------------------------
+def stream_resume_bytes(file_bytes, ext):
+    """
+    Same as parse_resume_bytes, yielding partial results as they are known:
+
+        {"event": "text", "chars", "tokens", "raw_tokens"}      text extracted
+        {"event": "header", "data": {...}}                    local fields
+        {"event": "section", "name": key, "data": value}      one per top-level field
+        {"event": "result", "data": {...}, "cached": bool}     final (sanitized) result
+
+    Sections are emitted as soon as the streamed completion has produced them
+    (one model, the last of PARSE_MODEL_TIERS). If streaming fails the resume
+    is parsed as usual and all sections are emitted at the end. Cached
+    results are sent the same way (text, header, sections, result) without
+    calling the model.
+    Raises ValueError if no text could be extracted.
+    """
+    resume_text = _extract_text(file_bytes, ext)
+    fields = extract_fields(resume_text)
+    text = compact_text(resume_text, PARSE_MAX_INPUT_TOKENS)
+    yield {
+        "event": "text",
+        "chars": len(text),
+        "tokens": estimate_tokens(text),
+        "raw_tokens": estimate_tokens(resume_text)
+    }
+    yield {"event": "header", "data": fields}
+
+    cache, key = _parsed_cache_entry(file_bytes)
+    cached = cache.get(key)
+    if cached is not None:
+        print(f"Parsed resume found in cache ({key[:16]}...)")
+        for name, value in cached.items():
+            yield {"event": "section", "name": name, "data": value}
+        yield {"event": "result", "data": cached, "cached": True}
+        return
+
+    try:
+        parsed_data = yield from _stream_sections(text, fields)
+    except Exception as e:
+        print(f"Streamed parsing failed: {e}")
+        parsed_data = None
+
+    if parsed_data is None:
+        # Parse as usual; sections sent again replace the partial ones
+        print("Parsing without streaming.")
+        parsed_data = parse_resume_with_groq(resume_text, fields=fields)
+        for name, value in (parsed_data or {}).items():
+            yield {"event": "section", "name": name, "data": value}
+
+    if parsed_data:
+        cache.set(key, parsed_data)
+    yield {"event": "result", "data": parsed_data, "cached": False}
+
+
+def _stream_sections(text, fields):
+    """
+    Stream the completion of the last model tier, yielding a section event per
+    completed top-level field. Returns the parsed resume, or None if the output
+    is not a valid resume even after local repair.
+    """
+    model = PARSE_MODEL_TIERS[-1]
+    start = time.perf_counter()
+    stream = chat_completion(
+        model=model,
+        messages=_parse_messages(
+            text, "Parse the following resume content into the defined JSON schema", format_hints(fields)
+        ),
+        response_format={"type": "json_schema", "json_schema": RESUME_JSON_SCHEMA},
+        stream=True
+    )
+
+    parser = TopLevelMemberParser()
+    chunks = []
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if not delta:
+            continue
+        chunks.append(delta)
+        for name, value in parser.feed(delta):
+            value = sanitize_json_output(value)
+            if name in ("contacts", "linkedin_url"):
+                value = apply_extracted_fields({"contacts": [], name: value}, fields)[name]
+            yield {"event": "section", "name": name, "data": value}
+
+    output = "".join(chunks)
+    data = load_json_output(output)
+    if not isinstance(data, dict) or validate_resume_json(data):
+        data = repair_resume_json(output)
+
+    elapsed = time.perf_counter() - start
+    _record_tier(model, elapsed, "accepted" if data else "failed")
+    if data is None:
+        return None
+    print(f"[{model}] streamed parse in {elapsed:.2f}s")
+    return apply_extracted_fields(sanitize_json_output(data), fields)
@@ -0,0 +1,234 @@
+"""
+Local JSON-schema validation and repair for LLM outputs.
+
+Only the subset of JSON schema used by our structured-output schemas is
+supported: "type" (single or list, incl. "null"), object "properties" /
+"required" / "additionalProperties", and array "items".
+"""
+
+import json
+import re
+
+
+def _types(schema):
+    t = schema.get("type")
+    if t is None:
+        return set()
+    return set(t) if isinstance(t, list) else {t}
+
+
+_TYPE_CHECKS = {
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "array": lambda v: isinstance(v, list),
+    "object": lambda v: isinstance(v, dict),
+    "null": lambda v: v is None,
+}
+
+
+# =============================================================================
+# VALIDATION
+# =============================================================================
+
+def compile_validator(schema):
+    """
+    Compile a schema (or a {"name", "schema"} structured-output wrapper) into a
+    function returning the list of validation errors of a value (empty = valid).
+    """
+    if "schema" in schema and "type" not in schema:
+        schema = schema["schema"]
+    check = _compile(schema)
+
+    def validate(value):
+        errors = []
+        check(value, "$", errors)
+        return errors
+    return validate
+
+
+def _compile(schema):
+    types = _types(schema)
+    type_checks = [_TYPE_CHECKS[t] for t in types if t in _TYPE_CHECKS]
+
+    props = {k: _compile(v) for k, v in schema.get("properties", {}).items()}
+    required = schema.get("required", [])
+    allow_extra = schema.get("additionalProperties", True) is not False
+    items = _compile(schema["items"]) if "items" in schema else None
+
+    def check(value, path, errors):
+        if type_checks and not any(c(value) for c in type_checks):
+            errors.append(f"{path}: expected {'/'.join(sorted(types))}, got {type(value).__name__}")
+            return
+        if isinstance(value, dict):
+            for key in required:
+                if key not in value:
+                    errors.append(f"{path}: missing required property '{key}'")
+            for key, sub in value.items():
+                if key in props:
+                    props[key](sub, f"{path}.{key}", errors)
+                elif not allow_extra:
+                    errors.append(f"{path}: unexpected property '{key}'")
+        elif isinstance(value, list) and items:
+            for i, sub in enumerate(value):
+                items(sub, f"{path}[{i}]", errors)
+    return check
+
+
+# =============================================================================
+# REPAIR
+# =============================================================================
+
+def repair(value, schema):
+    """
+    Deterministically coerce a value towards the schema:
+    missing required keys are filled (null, or an empty value for non-nullable
+    types), extra properties are dropped and scalar/array types are coerced.
+    """
+    if "schema" in schema and "type" not in schema:
+        schema = schema["schema"]
+    types = _types(schema)
+
+    if value is None:
+        return None if "null" in types or not types else _empty(schema)
+
+    if "object" in types:
+        if not isinstance(value, dict):
+            return None if "null" in types else _empty(schema)
+        props = schema.get("properties", {})
+        allow_extra = schema.get("additionalProperties", True) is not False
+        fixed = {}
+        for key, sub in value.items():
+            if key in props:
+                fixed[key] = repair(sub, props[key])
+            elif allow_extra:
+                fixed[key] = sub
+        for key in schema.get("required", []):
+            if key not in fixed:
+                fixed[key] = repair(None, props.get(key, {}))
+        return fixed
+
+    if "array" in types:
+        if not isinstance(value, list):
+            value = [value]
+        item_schema = schema.get("items", {})
+        if "object" in _types(item_schema):
+            value = [v for v in value if isinstance(v, dict)]
+        fixed = [repair(v, item_schema) for v in value]
+        # Drop items that could not be repaired into something meaningful
+        return [v for v in fixed if v is not None and v != ""] if item_schema else fixed
+
+    if "string" in types:
+        if isinstance(value, str):
+            return value
+        if isinstance(value, list):
+            return "\n".join(str(v) for v in value if v is not None)
+        if isinstance(value, dict):
+            return json.dumps(value, ensure_ascii=False)
+        return str(value)
+
+    if "boolean" in types:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in ("true", "yes", "1"):
+            return True
+        if isinstance(value, str) and value.strip().lower() in ("false", "no", "0"):
+            return False
+        return None if "null" in types else bool(value)
+
+    if types & {"integer", "number"}:
+        try:
+            number = float(value)
+            return int(number) if "integer" in types else number
+        except (TypeError, ValueError):
+            return None if "null" in types else 0
+
+    return value
+
+
+def _empty(schema):
+    """Value used for a missing non-nullable field."""
+    types = _types(schema)
+    if "null" in types:
+        return None
+    if "object" in types:
+        return repair({}, schema)
+    if "array" in types:
+        return []
+    if "string" in types:
+        return ""
+    if "boolean" in types:
+        return False
+    if types & {"integer", "number"}:
+        return 0
+    return None
+
+
+def load_json_output(text):
+    """Parse an LLM JSON output, tolerating markdown fences around it. Returns None if invalid."""
+    if not isinstance(text, str):
+        return text
+    text = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", text)
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        return None
+
+
+# =============================================================================
+# INCREMENTAL PARSING
+# =============================================================================
+
+class TopLevelMemberParser:
+    """
+    Incremental parser for a JSON object streamed in chunks: feed() returns
+    the (key, value) members of the top-level object completed so far.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.member_start = None
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        members = []
+        while self.pos < len(self.buffer):
+            char = self.buffer[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+                if self.depth == 1:
+                    self.member_start = self.pos + 1
+            elif char in "}]" or (char == "," and self.depth == 1):
+                if self.depth == 1 and self.member_start is not None:
+                    member = self._load(self.buffer[self.member_start:self.pos])
+                    if member:
+                        members.append(member)
+                    self.member_start = self.pos + 1
+                if char != ",":
+                    self.depth -= 1
+            self.pos += 1
+        return members
+
+    @staticmethod
+    def _load(text):
+        if not text.strip():
+            return None
+        try:
+            member = json.loads("{" + text + "}")
+        except ValueError:
+            return None
+        return next(iter(member.items()), None)
@@ -76,6 +76,19 @@ def months_difference(date1: datetime, date2: datetime) -> int:
     return abs((date1.year - date2.year) * 12 + (date1.month - date2.month))
 
 
+# =============================================================================
+# METRICS
+# =============================================================================
+
+def percentile(values, q: float) -> float | None:
+    """q-th percentile (0-100) of a list of numbers, nearest-rank method."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(q / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
 # =============================================================================
 # SIMILARITY METHODS
 # =============================================================================
@@ -0,0 +1,100 @@
+import sys
+import os
+
+# Add parent directory to path to allow importing services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from services import cache as cache_module
+from services.cache import DiskCache
+from services import resume_parser
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def make_cache(self, **kwargs):
+        return DiskCache('test', path=os.path.join(self.tmp_dir, 'test.db'), **kwargs)
+
+    def test_roundtrip_and_counters(self):
+        cache = self.make_cache()
+        self.assertIsNone(cache.get('missing'))
+        cache.set('json', {'name': 'Jane', 'skills': ['Python']})
+        cache.set('raw', b'\x00\x01')
+        self.assertEqual(cache.get('json'), {'name': 'Jane', 'skills': ['Python']})
+        self.assertEqual(cache.get('raw'), b'\x00\x01')
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (2, 1, 2))
+
+    def test_persists_across_instances(self):
+        self.make_cache().set('key', 'value')
+        self.assertEqual(self.make_cache().get('key'), 'value')
+
+    def test_expired_entries_are_ignored(self):
+        cache = self.make_cache(max_age=60)
+        cache.set('key', 'value')
+        with patch('services.cache.time.time', return_value=cache_module.time.time() + 120):
+            self.assertIsNone(cache.get('key'))
+
+    def test_evicts_least_recently_used(self):
+        cache = self.make_cache(max_bytes=20)
+        cache.set('a', 'x' * 8)
+        cache.set('b', 'x' * 8)
+        cache.get('a')  # 'b' is now the least recently used
+        cache.set('c', 'x' * 8)
+        cache.evict()
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.patches = [
+            patch.object(cache_module, 'CACHE_DIR', self.tmp_dir),
+            patch.dict(cache_module._caches, clear=True),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    @patch('services.resume_parser.parse_resume_with_groq')
+    @patch('services.resume_parser.process_file_bytes')
+    def test_identical_file_is_parsed_once(self, mock_extract, mock_parse):
+        mock_extract.return_value = 'Jane Doe\nPython developer'
+        mock_parse.return_value = {'name': 'Jane Doe'}
+
+        first = resume_parser.parse_resume_bytes(b'%PDF same bytes', '.pdf')
+        second = resume_parser.parse_resume_bytes(b'%PDF same bytes', '.pdf')
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_extract.call_count, 1)
+        self.assertEqual(mock_parse.call_count, 1)
+
+        resume_parser.parse_resume_bytes(b'%PDF other bytes', '.pdf')
+        self.assertEqual(mock_parse.call_count, 2)
+
+    @patch('services.resume_parser.parse_resume_with_groq')
+    @patch('services.resume_parser.process_file_bytes')
+    def test_extraction_error(self, mock_extract, mock_parse):
+        mock_extract.return_value = 'Error: API Error 500'
+        with self.assertRaises(ValueError):
+            resume_parser.parse_resume_bytes(b'%PDF', '.pdf')
+        mock_parse.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,511 @@
+import sys
+import os
+
+# Add parent directory to path to allow importing services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import numpy as np
+import spacy
+from services import enrichment
+from services import cache as cache_module
+
+
+def make_test_nlp():
+    """Blank English pipeline with a sentencizer and a few word vectors (synonyms share one)."""
+    nlp = spacy.blank('en')
+    nlp.add_pipe('sentencizer')
+    rng = np.random.default_rng(0)
+    for words in [('built', 'created'), ('pipeline', 'workflow'), ('python',), ('dashboards',),
+                  ('managed',), ('team',), ('engineers',), ('recruited',), ('interns',)]:
+        vector = rng.normal(size=16)
+        for word in words:
+            nlp.vocab.set_vector(word, vector)
+    return nlp
+
+
+class TestSharedNlp(unittest.TestCase):
+    def setUp(self):
+        # Importing app may have started a warm-up already
+        for thread in threading.enumerate():
+            if thread.name == "nlp-warmup":
+                thread.join()
+        self.reset = patch.multiple(enrichment, _nlp=None, _nlp_loaded=False)
+        self.reset.start()
+
+    def tearDown(self):
+        self.reset.stop()
+
+    @patch('services.enrichment.spacy.load')
+    def test_model_loaded_once_without_unused_components(self, mock_load):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            models = list(executor.map(lambda _: enrichment.DescriptionMergerNLP().nlp_en, range(16)))
+
+        mock_load.assert_called_once_with('en_core_web_sm', exclude=['ner', 'lemmatizer'])
+        self.assertTrue(all(m is mock_load.return_value for m in models))
+
+    @patch('services.enrichment.spacy.load')
+    def test_missing_model(self, mock_load):
+        mock_load.side_effect = OSError('not installed')
+        self.assertIsNone(enrichment.get_nlp())
+        self.assertIsNone(enrichment.get_nlp())
+        self.assertEqual(mock_load.call_count, 1)
+
+    @patch('services.enrichment.spacy.load')
+    def test_warm_up(self, mock_load):
+        enrichment.warm_nlp().join()
+        mock_load.return_value.assert_called_once()
+
+
+class TestDescriptionMerge(unittest.TestCase):
+    def setUp(self):
+        self.nlp = make_test_nlp()
+        with patch('services.enrichment.get_nlp', return_value=self.nlp):
+            self.merger = enrichment.DescriptionMergerNLP()
+
+    def test_linkedin_sentences_are_deduplicated_and_tagged(self):
+        resume = "• Built a data pipeline in Python for the finance team.\n• Managed a team of five engineers."
+        linkedin = (
+            "Built a data pipeline in Python for the finance team. "    # exact
+            "Created a data workflow in Python for the finance team. "  # same vectors
+            "Recruited and trained three interns every summer. "        # new
+            "Recruited and trained three interns every summer!"         # duplicate of a kept one
+        )
+        with patch.object(self.merger, '_detect_lang', return_value='en'):
+            merged = self.merger.merge_text(resume, linkedin)
+
+        self.assertEqual(merged.split("\n"), [
+            "• Built a data pipeline in Python for the finance team.",
+            "• Managed a team of five engineers.",
+            "• Recruited and trained three interns every summer. [Linkedin]",
+        ])
+
+    def test_sentences_are_encoded_in_one_pass(self):
+        res = [f"Built pipeline number {i} in python for the team." for i in range(25)]
+        li = [f"Recruited interns for project {i} and managed engineers." for i in range(25)]
+        with patch.object(self.nlp, 'pipe', wraps=self.nlp.pipe) as mock_pipe:
+            kept = self.merger._new_linkedin_sentences(res, li)
+        self.assertEqual(mock_pipe.call_count, 1)
+        self.assertEqual(kept, li[:1])
+
+
+class TestSentenceSegmentation(unittest.TestCase):
+    def setUp(self):
+        self.nlp = make_test_nlp()
+        with patch('services.enrichment.get_nlp', return_value=self.nlp):
+            self.merger = enrichment.DescriptionMergerNLP()
+
+    def test_bullets_and_lines_are_split_without_spacy(self):
+        text = (
+            "• Built ETL pipelines (Python, SQL), e.g. Airflow. Reduced runtime by a factor of 10.\n"
+            "- Managed a team of five engineers\n"
+            "Technologies: Python, SQL"
+        )
+        with patch('services.enrichment.get_sentencizer') as mock_sentencizer:
+            sentences = enrichment.split_sentences(text)
+        mock_sentencizer.assert_not_called()
+        self.assertEqual(sentences, [
+            "Built ETL pipelines (Python, SQL), e.g. Airflow.",
+            "Reduced runtime by a factor of 10.",
+            "Managed a team of five engineers",
+            "Technologies: Python, SQL",
+        ])
+
+    def test_paragraph_uses_the_sentencizer(self):
+        text = "Built a data pipeline in Python. Managed a team of five engineers."
+        self.assertEqual(enrichment.split_sentences(text), [
+            "Built a data pipeline in Python.",
+            "Managed a team of five engineers.",
+        ])
+
+    def test_unique_sentences_skip_the_full_pipeline(self):
+        text = "• Built a data pipeline in Python.\n• Built a data pipeline in Python.\n• Short one\n• Skills: Python, SQL"
+        with patch.object(self.merger, 'nlp_en', wraps=self.nlp) as mock_nlp:
+            sentences = self.merger._get_unique_sentences(text)
+        mock_nlp.assert_not_called()
+        self.assertEqual(sentences, ["Built a data pipeline in Python."])
+
+    @patch('services.enrichment.SEGMENTATION_MODE', 'spacy')
+    def test_spacy_mode_uses_the_full_pipeline(self):
+        text = "Built a data pipeline in Python. Managed a team of five engineers."
+        with patch.object(self.merger, 'nlp_en', wraps=self.nlp) as mock_nlp:
+            sentences = self.merger._get_unique_sentences(text)
+        mock_nlp.assert_called_once_with(text)
+        self.assertEqual(sentences, ["Built a data pipeline in Python.", "Managed a team of five engineers."])
+
+
+def fake_completion(content):
+    import json
+    from types import SimpleNamespace
+    message = SimpleNamespace(content=json.dumps(content))
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@patch.dict(os.environ, {'GROQ_API_KEY': 'test-key'})
+class TestTranslationCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.patches = [
+            patch.object(cache_module, 'CACHE_DIR', self.tmp_dir),
+            patch.dict(cache_module._caches, clear=True),
+            patch('services.enrichment.get_nlp', return_value=None),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    @patch('services.llm.chat_completion')
+    def test_repeat_translations_hit_the_cache(self, mock_completion):
+        mock_completion.return_value = fake_completion({'translated_text': 'Built ETL pipelines.'})
+
+        first = enrichment.DescriptionMergerNLP()._translate_description_groq('Développé des pipelines ETL.')
+        # New merger (new request), same text up to whitespace
+        second = enrichment.DescriptionMergerNLP()._translate_description_groq('  Développé des   pipelines ETL.\n')
+
+        self.assertEqual(first, 'Built ETL pipelines.')
+        self.assertEqual(second, first)
+        self.assertEqual(mock_completion.call_count, 1)
+        stats = cache_module.all_stats()['translations']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    @patch('services.llm.chat_completion')
+    def test_errors_are_not_cached(self, mock_completion):
+        mock_completion.side_effect = [Exception('timeout'), fake_completion({'translated_text': 'Hello'})]
+        merger = enrichment.DescriptionMergerNLP()
+        self.assertEqual(merger._translate_description_groq('Bonjour'), 'Bonjour')
+        self.assertEqual(merger._translate_description_groq('Bonjour'), 'Hello')
+
+
+class FakeEncoder:
+    """sentence-transformers stand-in: one axis per concept, in any language."""
+    CONCEPTS = [("pipeline",), ("team", "équipe"), ("interns", "stagiaires")]
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, convert_to_numpy=True):
+        self.encoded.append(list(texts))
+        vectors = np.array([[float(any(w in t.lower() for w in words)) for words in self.CONCEPTS]
+                            for t in texts], dtype=np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+@patch('services.enrichment.DEDUP_BACKEND', 'embedding')
+class TestEmbeddingBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.encoder = FakeEncoder()
+        self.patches = [
+            patch.object(cache_module, 'CACHE_DIR', self.tmp_dir),
+            patch.dict(cache_module._caches, clear=True),
+            patch('services.enrichment.get_embedder', return_value=self.encoder),
+        ]
+        for p in self.patches:
+            p.start()
+        with patch('services.enrichment.get_nlp', return_value=make_test_nlp()):
+            self.merger = enrichment.DescriptionMergerNLP()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_embeddings_are_cached_by_sentence(self):
+        texts = ["Built a data pipeline.", "Managed a team.", "Built a data pipeline."]
+        first = enrichment.embed_sentences(self.encoder, texts)
+        second = enrichment.embed_sentences(self.encoder, ["Managed   a team.", "Hired interns."])
+
+        self.assertEqual(self.encoder.encoded, [texts[:2], ["Hired interns."]])
+        self.assertEqual(first.shape, (3, 3))
+        np.testing.assert_array_equal(first[0], first[2])
+        np.testing.assert_array_equal(second[0], first[1])
+        stats = cache_module.all_stats()['embeddings']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 4))
+
+    @patch('services.llm.chat_completion')
+    def test_cross_language_merge_without_translation(self, mock_completion):
+        resume = "• Développé un pipeline de données pour la finance.\n• Encadré une équipe de cinq ingénieurs."
+        linkedin = "• Built a data pipeline for the finance department.\n• Recruited and trained interns every summer."
+
+        merged = self.merger.merge_text(resume, linkedin)
+
+        mock_completion.assert_not_called()
+        self.assertEqual(merged.split("\n"), [
+            "• Développé un pipeline de données pour la finance.",
+            "• Encadré une équipe de cinq ingénieurs.",
+            "• Recruited and trained interns every summer. [Linkedin]",
+        ])
+
+    @patch('services.llm.chat_completion')
+    def test_new_items_are_not_translated(self, mock_completion):
+        linkedin = {'experiences': [{'position_title': 'Ingénieur données', 'company': 'Acme',
+                                     'description': 'Développé des pipelines de données.'}]}
+        with patch('services.enrichment.get_nlp', return_value=make_test_nlp()):
+            merger = enrichment.ProfileMerger({'experiences': []}, linkedin)
+        matches = merger.match_section('experiences', ['position_title'])
+        merger.prefetch_translations({'experiences': matches})
+        merged = merger.merge_section('experiences', ['position_title'], matches)
+
+        mock_completion.assert_not_called()
+        self.assertEqual(merged[0]['description'], 'Développé des pipelines de données. [Linkedin]')
+
+    def test_missing_dependency_falls_back_to_spacy(self):
+        self.patches[2].stop()
+        try:
+            with patch.multiple(enrichment, _embedder=None, _embedder_loaded=False), \
+                    patch.dict(sys.modules, {'sentence_transformers': None}):
+                self.assertIsNone(enrichment.get_embedder())
+                with patch('services.enrichment.get_nlp', return_value=None):
+                    self.assertIsNone(enrichment.DescriptionMergerNLP().embedder)
+        finally:
+            self.patches[2].start()
+
+
+def fake_batch_translation(**kwargs):
+    import json
+    name = kwargs['response_format']['json_schema']['name']
+    assert name == 'translation_batch_response', f'unexpected {name} call'
+    prompt = kwargs['messages'][1]['content']
+    items = json.loads(prompt[prompt.index('['):prompt.rindex(']') + 1])
+    return fake_completion({'translations': [
+        {'id': item['id'], 'translated_text': f"Translated: {item['text']}"} for item in items
+    ]})
+
+
+@patch.dict(os.environ, {'GROQ_API_KEY': 'test-key'})
+class TestBatchedTranslation(unittest.TestCase):
+    RESUME = {
+        'name': 'Jane Doe',
+        'experiences': [
+            {'position_title': 'Data Scientist', 'institution_name': 'Crédit Agricole',
+             'description': "Développement d'un modèle d'optimisation du collatéral pour la banque."},
+            {'position_title': 'Analyste', 'institution_name': 'Société Générale',
+             'description': "Analyse des données de risque et création de tableaux de bord."},
+        ],
+        'educations': [], 'projects': []
+    }
+    LINKEDIN = {
+        'experiences': [
+            {'position_title': 'Stagiaire Data', 'institution_name': 'Groupe Crédit Agricole',
+             'description': "Mise en place de pipelines de données automatisés en Python."},
+            {'position_title': 'Consultant', 'institution_name': 'Capgemini',
+             'description': "Conseil en transformation numérique pour des clients industriels."},
+        ],
+        'educations': [],
+        'projects': [{'project_name': 'Chatbot', 'description': 'Création d\'un assistant conversationnel.'}]
+    }
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.patches = [
+            patch.object(cache_module, 'CACHE_DIR', self.tmp_dir),
+            patch.dict(cache_module._caches, clear=True),
+            patch('services.enrichment.get_nlp', return_value=make_test_nlp()),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    @patch('services.llm.chat_completion')
+    def test_profile_translated_in_one_call(self, mock_completion):
+        mock_completion.side_effect = fake_batch_translation
+        merged = enrichment.ProfileMerger(self.RESUME, self.LINKEDIN).process()
+
+        self.assertEqual(mock_completion.call_count, 1)
+        experiences = merged['experiences']
+        self.assertEqual(len(experiences), 3)
+        self.assertIn('Translated:', experiences[0]['description'])
+        self.assertIn('[Linkedin]', experiences[0]['description'])
+        self.assertEqual(experiences[1]['description'], self.RESUME['experiences'][1]['description'])
+        self.assertTrue(experiences[2]['description'].startswith('Translated:'))
+        self.assertTrue(merged['projects'][0]['description'].endswith('[Linkedin]'))
+
+        # Repeat enrichment: everything comes from the translation cache
+        enrichment.ProfileMerger(self.RESUME, self.LINKEDIN).process()
+        self.assertEqual(mock_completion.call_count, 1)
+
+    @patch('services.llm.chat_completion')
+    def test_batches_are_split(self, mock_completion):
+        mock_completion.side_effect = fake_batch_translation
+        texts = [f'Texte numéro {i}' for i in range(5)]
+        with patch.object(enrichment, 'TRANSLATION_BATCH_MAX_ITEMS', 2):
+            translations = enrichment.DescriptionMergerNLP().translate_batch(texts)
+        self.assertEqual(mock_completion.call_count, 3)
+        self.assertEqual(len(translations), 5)
+
+
+class TestSectionMatching(unittest.TestCase):
+    def setUp(self):
+        self.nlp_patch = patch('services.enrichment.get_nlp', return_value=None)
+        self.nlp_patch.start()
+
+    def tearDown(self):
+        self.nlp_patch.stop()
+
+    def match(self, res_names, li_names):
+        merger = enrichment.ProfileMerger(
+            {'experiences': [{'institution_name': n} for n in res_names]},
+            {'experiences': [{'institution_name': n} for n in li_names]}
+        )
+        pairs, unmatched = merger.match_section('experiences', ['institution_name'])
+        return [(a['institution_name'], b and b['institution_name']) for a, b in pairs], unmatched
+
+    def test_assignment_is_global(self):
+        # Greedy matching in resume order would give "Capgemini" to the first item
+        pairs, unmatched = self.match(['Capgemini Invent', 'Capgemini'], ['Capgemini', 'Invent Consulting'])
+        self.assertEqual(pairs, [('Capgemini Invent', None), ('Capgemini', 'Capgemini')])
+        self.assertEqual(unmatched, [{'institution_name': 'Invent Consulting'}])
+
+    def test_normalized_names_match(self):
+        pairs, unmatched = self.match(
+            ['Crédit Agricole SA', 'Société Générale', 'Stage', None],
+            ['Societe Generale · Internship', 'Groupe Crédit Agricole · Internship', 'Stage']
+        )
+        self.assertEqual(pairs, [
+            ('Crédit Agricole SA', 'Groupe Crédit Agricole · Internship'),
+            ('Société Générale', 'Societe Generale · Internship'),
+            ('Stage', 'Stage'),
+            (None, None),
+        ])
+        self.assertEqual(unmatched, [])
+
+    def test_array_merge(self):
+        merged = enrichment.ProfileMerger(
+            {'interests': ['Chess', 'Running'], 'experiences': []},
+            {'interests': ['Running', 'Jazz']}
+        ).process()
+        self.assertEqual(merged['interests'], ['Chess', 'Running', 'Jazz [Linkedin]'])
+
+
+@patch.dict(os.environ, {'GROQ_API_KEY': 'test-key'})
+class TestConcurrentEnrichment(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.patches = [
+            patch.object(cache_module, 'CACHE_DIR', self.tmp_dir),
+            patch.dict(cache_module._caches, clear=True),
+            patch('services.enrichment.get_nlp', return_value=None),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    @patch('services.llm.chat_completion')
+    def test_translation_batches_run_concurrently(self, mock_completion):
+        import time
+
+        def slow_translation(**kwargs):
+            time.sleep(0.3)
+            return fake_batch_translation(**kwargs)
+        mock_completion.side_effect = slow_translation
+
+        start = time.perf_counter()
+        with patch.object(enrichment, 'TRANSLATION_BATCH_MAX_ITEMS', 1):
+            translations = enrichment.DescriptionMergerNLP().translate_batch(['un', 'deux', 'trois'])
+        self.assertEqual(len(translations), 3)
+        self.assertLess(time.perf_counter() - start, 0.8)
+
+    def test_sections_merged_concurrently(self):
+        import threading
+        import time
+        barrier = threading.Barrier(3, timeout=2)
+
+        def merge_section(section_name, match_keys, matches=None):
+            # Fails (BrokenBarrierError) unless the three sections run at the same time
+            barrier.wait()
+            return [section_name]
+
+        merger = enrichment.ProfileMerger({'experiences': []}, {'experiences': []})
+        with patch.object(merger, 'merge_section', side_effect=merge_section):
+            merged = merger.process()
+        self.assertEqual(merged['experiences'], ['experiences'])
+        self.assertEqual(merged['projects'], ['projects'])
+
+    @patch('services.enrichment.scrape_linkedin_profile')
+    def test_merge_does_not_block_event_loop(self, mock_scrape):
+        import asyncio
+        import time
+
+        async def scrape(linkedin_url, name):
+            return {'experiences': []}
+        mock_scrape.side_effect = scrape
+
+        merge_done = []
+
+        def slow_process(self):
+            time.sleep(0.3)
+            merge_done.append(True)
+            return {'name': 'Jane'}
+
+        async def run():
+            ticks_during_merge = []
+
+            async def ticker():
+                for _ in range(5):
+                    await asyncio.sleep(0.02)
+                    ticks_during_merge.append(not merge_done)
+            result, _ = await asyncio.gather(enrichment.enrich_candidate({'experiences': []}, 'url', 'Jane'), ticker())
+            return result, ticks_during_merge
+
+        with patch.object(enrichment.ProfileMerger, 'process', slow_process):
+            result, ticks_during_merge = asyncio.run(run())
+        self.assertEqual(result, {'name': 'Jane'})
+        # The event loop kept running while the merge was in progress
+        self.assertTrue(all(ticks_during_merge))
+
+
+class TestLanguageDetection(unittest.TestCase):
+    def setUp(self):
+        enrichment._lang_cache.clear()
+
+    @patch('services.enrichment.detect')
+    def test_english_fast_path(self, mock_detect):
+        text = 'Built and deployed a model to improve the efficiency of the financing team.'
+        self.assertEqual(enrichment.detect_language(text), 'en')
+        mock_detect.assert_not_called()
+
+    @patch('services.enrichment.detect')
+    def test_short_english_fast_path(self, mock_detect):
+        for text in ('Data Engineer', 'Python, SQL, Docker', 'Senior ML Engineer - Acme'):
+            self.assertEqual(enrichment.detect_language(text), 'en', text)
+        mock_detect.assert_not_called()
+
+    def test_short_french_is_detected(self):
+        with patch('services.enrichment.detect', return_value='fr') as mock_detect:
+            self.assertEqual(enrichment.detect_language('Chef de projet data'), 'fr')
+        mock_detect.assert_called_once()
+
+    def test_detection_is_memoized_and_deterministic(self):
+        text = "Développement d'un modèle d'optimisation du collatéral pour la banque."
+        with patch('services.enrichment.detect', wraps=enrichment.detect) as mock_detect:
+            results = {enrichment.detect_language(text) for _ in range(5)}
+            enrichment.detect_language(f"  {text}\n")
+        self.assertEqual(results, {'fr'})
+        self.assertEqual(mock_detect.call_count, 1)
+
+    def test_ascii_french_is_not_assumed_english(self):
+        self.assertEqual(
+            enrichment.detect_language('Mise en place de pipelines de donnees automatises pour le reporting de la banque.'),
+            'fr'
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import sys
+import os
+
+# Add parent directory to path to allow importing app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+import shutil
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
+import app
+from services import jobs
+
+
+class TestAsyncUploadJobs(unittest.TestCase):
+    def setUp(self):
+        app.app.config['TESTING'] = True
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_patch = patch.object(jobs, 'JOBS_DB_PATH', os.path.join(self.tmp_dir, 'jobs.db'))
+        self.db_patch.start()
+        # Jobs are processed explicitly with jobs.process_next in these tests
+        self.workers_patch = patch.object(jobs, 'start_workers')
+        self.workers_patch.start()
+        self.client = app.app.test_client()
+
+    def tearDown(self):
+        self.workers_patch.stop()
+        self.db_patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def create_zip_with_files(self, files):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            for filename, content in files.items():
+                zf.writestr(filename, content)
+        buffer.seek(0)
+        return buffer
+
+    @patch('app.process_single_resume')
+    def test_async_zip_upload_returns_job(self, mock_process):
+        def fake_process(content, filename, job_offer_id):
+            if filename == 'broken.pdf':
+                raise Exception('OCR failed')
+            return {'filename': filename, 'content': content.decode(), 'job_offer_id': job_offer_id}
+        mock_process.side_effect = fake_process
+
+        zip_file = self.create_zip_with_files({
+            'a.pdf': 'aaa',
+            'broken.pdf': 'bbb',
+            'notes.txt': 'ccc',
+        })
+        response = self.client.post('/api/upload-resume?async=1', data={
+            'file': (zip_file, 'resumes.zip'),
+            'job_offer_id': 'offer-1'
+        }, content_type='multipart/form-data')
+
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json['job_id']
+        mock_process.assert_not_called()
+
+        status = self.client.get(f'/api/jobs/{job_id}').json
+        self.assertEqual(status['status'], 'processing')
+        self.assertEqual(status['counts'], {'queued': 2, 'processing': 0, 'done': 0, 'failed': 1})
+
+        while jobs.process_next(app.process_single_resume_job):
+            pass
+
+        status = self.client.get(f'/api/jobs/{job_id}').json
+        self.assertEqual(status['status'], 'completed')
+        self.assertEqual(status['progress'], 1.0)
+        self.assertEqual(status['data'], [{'filename': 'a.pdf', 'content': 'aaa', 'job_offer_id': 'offer-1'}])
+        self.assertEqual([e['filename'] for e in status['errors']], ['broken.pdf', 'notes.txt'])
+        self.assertEqual([f['status'] for f in status['files']], ['done', 'failed', 'failed'])
+
+    def test_unknown_job(self):
+        response = self.client.get('/api/jobs/does-not-exist')
+        self.assertEqual(response.status_code, 404)
+
+    def test_stale_file_is_requeued(self):
+        job_id = jobs.create_job([('a.pdf', b'aaa', None)])
+        with patch.object(jobs, 'JOB_STALE_AFTER', -1):
+            conn = jobs._connect()
+            self.assertIsNotNone(jobs._claim_next(conn))
+            # Claimed but never finished (worker died): picked up again
+            self.assertIsNotNone(jobs._claim_next(conn))
+            conn.close()
+        self.assertEqual(jobs.get_job(job_id)['counts']['processing'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import sys
+import os
+
+# Add parent directory to path to allow importing services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import shutil
+import asyncio
+import tempfile
+import unittest
+import httpx
+from groq import Groq, AsyncGroq
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from services import llm
+from services import ratelimit
+
+
+@patch.dict(os.environ, {'GROQ_API_KEY': 'test-key'})
+class TestSharedGroqClient(unittest.TestCase):
+    def setUp(self):
+        llm._client = None
+
+    def test_one_client_shared_by_threads(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            clients = list(executor.map(lambda _: llm.get_groq_client(), range(16)))
+        self.assertTrue(all(c is clients[0] for c in clients))
+
+    def test_async_client_per_event_loop(self):
+        async def get_twice():
+            return llm.get_async_groq_client(), llm.get_async_groq_client()
+
+        first_a, first_b = asyncio.run(get_twice())
+        second, _ = asyncio.run(get_twice())
+        self.assertIs(first_a, first_b)
+        self.assertIsNot(first_a, second)
+
+
+def groq_response(request, status=200, headers=None):
+    body = {
+        'id': 'c', 'object': 'chat.completion', 'created': 0, 'model': 'm',
+        'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': 'ok'}}]
+    } if status == 200 else {'error': {'message': 'rate limited'}}
+    return httpx.Response(status, headers=headers or {}, content=json.dumps(body), request=request)
+
+
+class FakeClock:
+    """time.time / time.sleep pair where sleeping only advances the clock."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.patches = [
+            patch.object(ratelimit, 'RATE_LIMIT_STATE_PATH', os.path.join(self.tmp_dir, 'ratelimit.json')),
+            patch.object(llm, 'GROQ_RATE_LIMITER', True),
+        ]
+        for p in self.patches:
+            p.start()
+        self.responses = []
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def fake_client(self):
+        def handler(request):
+            return groq_response(request, *self.responses.pop(0))
+        return Groq(api_key='test-key', max_retries=0, http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+
+    def call(self):
+        return llm.chat_completion(model='m', messages=[{'role': 'user', 'content': 'x' * 400}], max_completion_tokens=100)
+
+    def test_parse_duration(self):
+        self.assertEqual(ratelimit.parse_duration('2m59.5s'), 179.5)
+        self.assertEqual(ratelimit.parse_duration('120ms'), 0.12)
+        self.assertEqual(ratelimit.parse_duration('7'), 7.0)
+        self.assertIsNone(ratelimit.parse_duration(None))
+
+    def test_exhausted_budget_waits_for_reset(self):
+        self.responses = [(200, {
+            'x-ratelimit-remaining-tokens': '50', 'x-ratelimit-reset-tokens': '6s',
+            'x-ratelimit-remaining-requests': '100', 'x-ratelimit-reset-requests': '1m',
+        })]
+        with patch.object(llm, 'get_groq_client', self.fake_client):
+            self.assertEqual(self.call().choices[0].message.content, 'ok')
+
+        # 200 estimated tokens do not fit in the 50 left: the next call must wait
+        wait = ratelimit.reserve('m', ratelimit.estimate_request_tokens(
+            {'messages': [{'content': 'x' * 400}], 'max_completion_tokens': 100}))
+        self.assertGreater(wait, 5)
+        self.assertLessEqual(wait, 6)
+        self.assertEqual(ratelimit.reserve('other-model', 200), 0)
+
+    def test_429_is_queued_and_retried(self):
+        clock = FakeClock()
+        self.responses = [(429, {'retry-after': '3'}), (200, {})]
+        with patch('time.time', clock.time), patch('time.sleep', clock.sleep), \
+                patch.object(llm, 'get_groq_client', self.fake_client):
+            self.assertEqual(self.call().choices[0].message.content, 'ok')
+
+        self.assertEqual(self.responses, [])
+        self.assertEqual(clock.sleeps, [3])
+
+    def test_429_waits_retry_after_past_max_wait(self):
+        clock = FakeClock()
+        self.responses = [(429, {'retry-after': '30'}), (429, {'retry-after': '30'}), (200, {})]
+        with patch.object(llm, 'GROQ_RATE_LIMIT_MAX_WAIT', 0), \
+                patch('time.time', clock.time), patch('time.sleep', clock.sleep), \
+                patch.object(llm, 'get_groq_client', self.fake_client):
+            self.assertEqual(self.call().choices[0].message.content, 'ok')
+
+        self.assertEqual(self.responses, [])
+        self.assertEqual(clock.sleeps, [30, 30])
+
+    def test_async_429_is_queued_and_retried(self):
+        clock = FakeClock()
+        self.responses = [(429, {'retry-after': '3'}), (200, {})]
+
+        async def fake_sleep(seconds):
+            clock.sleep(seconds)
+
+        async def handler(request):
+            return groq_response(request, *self.responses.pop(0))
+
+        async def call():
+            client = AsyncGroq(api_key='test-key', max_retries=0,
+                               http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+            with patch.object(llm, 'get_async_groq_client', return_value=client):
+                return await llm.async_chat_completion(
+                    model='m', messages=[{'role': 'user', 'content': 'x'}], max_completion_tokens=100)
+
+        with patch('time.time', clock.time), patch.object(llm.asyncio, 'sleep', fake_sleep):
+            response = asyncio.run(call())
+
+        self.assertEqual(response.choices[0].message.content, 'ok')
+        self.assertEqual(self.responses, [])
+        self.assertEqual(clock.sleeps, [3])
+
+    def test_gives_up_after_max_429s(self):
+        from groq import RateLimitError
+        clock = FakeClock()
+        self.responses = [(429, {'retry-after': '1'})] * 3
+        with patch.object(llm, 'GROQ_RATE_LIMIT_RETRIES', 2), \
+                patch('time.time', clock.time), patch('time.sleep', clock.sleep), \
+                patch.object(llm, 'get_groq_client', self.fake_client):
+            with self.assertRaises(RateLimitError):
+                self.call()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,492 @@
+import sys
+import os
+
+# Add parent directory to path to allow importing services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import fitz
+from services import resume_parser
+from services import cache as cache_module
+from services.extraction import extract_fields, split_contacts
+from services.compaction import compact_text, estimate_tokens
+
+
+def make_scanned_pdf(pages):
+    """PDF whose pages have too little text, so every page goes through OCR."""
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"page {i + 1}")
+    return doc.tobytes()
+
+
+def fake_ocr_result(text):
+    return {"data": [{"text_detections": [{"text_prediction": {"text": text}}]}]}
+
+
+class TestPdfOcr(unittest.TestCase):
+    def setUp(self):
+        # Each test gets empty caches
+        self.tmp_dir = tempfile.mkdtemp()
+        self.patches = [
+            patch.object(cache_module, 'CACHE_DIR', self.tmp_dir),
+            patch.dict(cache_module._caches, clear=True),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_pages_are_ocred_concurrently_in_order(self):
+        calls = []
+
+        def fake_ocr(images):
+            index = len(calls)
+            calls.append(index)
+            # First batch answers last
+            time.sleep(0.2 if index == 0 else 0.0)
+            return [fake_ocr_result(f"text {index + 1}") for _ in images]
+
+        with patch.object(resume_parser, 'ocr_images', side_effect=fake_ocr), \
+                patch.object(resume_parser, 'OCR_CONCURRENCY', 3), \
+                patch.object(resume_parser, 'OCR_BATCH_MAX_PAGES', 1):
+            results = resume_parser.process_pdf(make_scanned_pdf(3))
+
+        self.assertEqual([r['page'] for r in results], [1, 2, 3])
+        text = resume_parser.format_ocr_output(results)
+        self.assertLess(text.index('text 1'), text.index('text 2'))
+        self.assertLess(text.index('text 2'), text.index('text 3'))
+
+    def test_pages_are_batched_and_mapped_back(self):
+        posted = []
+
+        def fake_post(images):
+            posted.append(len(images))
+            return {"data": [
+                fake_ocr_result(f"page text {i}")["data"][0] for i in range(len(images))
+            ]}
+
+        with patch.object(resume_parser, '_post_ocr', side_effect=fake_post), \
+                patch.object(resume_parser, 'OCR_BATCH_MAX_PAGES', 2):
+            results = resume_parser.process_pdf(make_scanned_pdf(3))
+
+        self.assertEqual(sorted(posted), [1, 2])
+        texts = [resume_parser.extract_text_from_ocr_result(r['content']) for r in results]
+        self.assertEqual(texts, ['page text 0', 'page text 1', 'page text 0'])
+
+    def test_ocr_results_are_cached_per_page(self):
+        posted = []
+
+        def fake_post(images):
+            posted.append(len(images))
+            return {"data": [fake_ocr_result("cached text")["data"][0] for _ in images]}
+
+        pdf = make_scanned_pdf(2)
+        with patch.object(resume_parser, '_post_ocr', side_effect=fake_post):
+            first = resume_parser.process_pdf(pdf)
+            second = resume_parser.process_pdf(pdf)
+
+        self.assertEqual(posted, [2])
+        self.assertEqual([r['content'] for r in first], [r['content'] for r in second])
+        stats = cache_module.all_stats()['ocr_results']
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+
+    def test_ocr_errors_are_not_cached(self):
+        with patch.object(resume_parser, '_post_ocr', return_value={"error": "API Error 503"}) as mock_post:
+            resume_parser.ocr_pages([(b'img', 'png')])
+            resume_parser.ocr_pages([(b'img', 'png')])
+        self.assertEqual(mock_post.call_count, 2)
+
+    def test_batch_falls_back_to_single_pages(self):
+        def fake_post(images):
+            if len(images) > 1:
+                return {"error": "API Error 413", "body": "too large"}
+            return fake_ocr_result("single")
+
+        with patch.object(resume_parser, '_post_ocr', side_effect=fake_post):
+            results = resume_parser.ocr_images([(b'a', 'png'), (b'b', 'png')])
+
+        self.assertEqual(results, [fake_ocr_result("single")] * 2)
+
+    def test_render_page_uses_pixel_budget(self):
+        page = fitz.open(stream=make_scanned_pdf(1), filetype="pdf")[0]
+        with patch.object(resume_parser, 'OCR_TARGET_MEGAPIXELS', 2.0):
+            image_bytes, ext = resume_parser.render_page_for_ocr(page)
+
+        # Vector-only page: grayscale PNG close to the 2 MP budget
+        self.assertEqual(ext, 'png')
+        pix = fitz.Pixmap(image_bytes)
+        self.assertEqual(pix.n, 1)
+        self.assertAlmostEqual(pix.width * pix.height / 1_000_000, 2.0, delta=0.1)
+
+    def test_ocr_payload_is_valid_json(self):
+        import json
+        payload = json.loads(resume_parser.build_ocr_payload([(b'abc', '.jpeg'), (b'de', 'png')]))
+        self.assertEqual(payload['input'][0]['url'], 'data:image/jpeg;base64,YWJj')
+        self.assertEqual(payload['input'][1]['url'], 'data:image/png;base64,ZGU=')
+
+
+def fake_completion(content):
+    from types import SimpleNamespace
+    import json
+    message = SimpleNamespace(content=json.dumps(content))
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class TestTieredParsing(unittest.TestCase):
+    # Schema-complete resumes (missing fields filled by the local repair)
+    GOOD = resume_parser.repair_resume_json(
+        '{"name": "Jane Doe", "experiences": [{"position_title": "Dev", "institution_name": "ACME"}]}'
+    )
+    EMPTY = resume_parser.repair_resume_json('{"name": ""}')
+
+    def setUp(self):
+        resume_parser._parse_stats.clear()
+        self.tiers = patch.object(resume_parser, 'PARSE_MODEL_TIERS', ['small', 'big'])
+        self.tiers.start()
+
+    def tearDown(self):
+        self.tiers.stop()
+
+    @patch('services.resume_parser.chat_completion')
+    def test_fast_model_result_is_kept(self, mock_completion):
+        mock_completion.return_value = fake_completion(self.GOOD)
+        self.assertEqual(resume_parser.parse_resume_with_groq('resume text'), self.GOOD)
+        self.assertEqual([c.kwargs['model'] for c in mock_completion.call_args_list], ['small'])
+
+    @patch('services.resume_parser.chat_completion')
+    def test_escalates_when_key_fields_are_empty(self, mock_completion):
+        mock_completion.side_effect = [fake_completion(self.EMPTY), fake_completion(self.GOOD)]
+        self.assertEqual(resume_parser.parse_resume_with_groq('resume text'), self.GOOD)
+        self.assertEqual([c.kwargs['model'] for c in mock_completion.call_args_list], ['small', 'big'])
+
+        stats = resume_parser.get_parse_stats()['models']
+        self.assertEqual(stats['small']['escalation_rate'], 1.0)
+        self.assertEqual(stats['big']['accepted'], 1)
+        self.assertIsNotNone(stats['big']['p95_seconds'])
+
+
+class TestLocalRepair(unittest.TestCase):
+    @staticmethod
+    def validation_error(failed_generation):
+        import httpx
+        from groq import BadRequestError
+        response = httpx.Response(400, request=httpx.Request('POST', 'https://api.groq.com'))
+        body = {'error': {
+            'code': 'json_validate_failed',
+            'message': 'missing properties',
+            'failed_generation': failed_generation
+        }}
+        return BadRequestError('json_validate_failed', response=response, body=body)
+
+    def test_repair_fills_coerces_and_drops(self):
+        failed = '{"name": "Jane", "open_to_work": "true", "contacts": "jane@mail.com", ' \
+                 '"experiences": [{"position_title": "Dev", "institution_name": "ACME", "from_date": 2020, "team": "x"}], ' \
+                 '"skills": [{"category": "Languages", "items": "Python"}], "hobby": "chess"}'
+        repaired = resume_parser.repair_resume_json(failed)
+
+        self.assertEqual(resume_parser.validate_resume_json(repaired), [])
+        self.assertTrue(repaired['open_to_work'])
+        self.assertEqual(repaired['contacts'], ['jane@mail.com'])
+        self.assertEqual(repaired['experiences'][0]['from_date'], '2020')
+        self.assertIsNone(repaired['experiences'][0]['to_date'])
+        self.assertNotIn('team', repaired['experiences'][0])
+        self.assertNotIn('hobby', repaired)
+        self.assertEqual(repaired['skills'][0]['items'], ['Python'])
+        self.assertEqual(repaired['educations'], [])
+
+    @patch('services.resume_parser.chat_completion')
+    def test_failed_generation_is_repaired_without_retry(self, mock_completion):
+        mock_completion.side_effect = self.validation_error('{"name": "Jane", "experiences": []}')
+        with patch.object(resume_parser, 'PARSE_MODEL_TIERS', ['big']):
+            result = resume_parser.parse_resume_with_groq('resume text')
+
+        self.assertEqual(mock_completion.call_count, 1)
+        self.assertEqual(result['name'], 'Jane')
+        self.assertIsNone(result['linkedin_url'])
+
+    @patch('services.resume_parser.chat_completion')
+    def test_truncated_generation_falls_back_to_llm_retry(self, mock_completion):
+        good = {'name': 'Jane'}
+        mock_completion.side_effect = [self.validation_error('{"name": "Ja'), fake_completion(good)]
+        with patch.object(resume_parser, 'PARSE_MODEL_TIERS', ['big']):
+            result = resume_parser.parse_resume_with_groq('resume text')
+
+        self.assertEqual(result, good)
+        self.assertEqual(mock_completion.call_count, 2)
+
+
+class TestSectionParsing(unittest.TestCase):
+    TEXT = (
+        "Jane Doe\njane@mail.com\n"
+        "EXPERIENCE\nDeveloper at ACME, 2020 - 2023\n"
+        "Formation\nMSc Computer Science, Paris\n"
+        "Skills:\nPython, SQL\n"
+    )
+
+    def test_split_sections(self):
+        sections = resume_parser.split_resume_sections(self.TEXT)
+        self.assertEqual(list(sections), ['header', 'experience', 'education', 'skills'])
+        self.assertIn('jane@mail.com', sections['header'])
+        self.assertIn('ACME', sections['experience'])
+
+    @patch('services.resume_parser.chat_completion')
+    def test_sections_are_parsed_with_sub_schemas_and_merged(self, mock_completion):
+        answers = {
+            'resume_header_schema': {'name': 'Jane Doe', 'contacts': ['jane@mail.com']},
+            'resume_experience_schema': {'experiences': [{'position_title': 'Developer', 'institution_name': 'ACME'}]},
+            'resume_education_schema': {'educations': [{'degree': 'MSc', 'institution_name': 'Paris'}]},
+            'resume_skills_schema': {'skills': [{'category': 'Languages', 'items': ['Python', 'SQL']}]},
+        }
+
+        def fake(**kwargs):
+            schema = kwargs['response_format']['json_schema']
+            answer = resume_parser.repair(answers[schema['name']], schema)
+            return fake_completion(answer)
+        mock_completion.side_effect = fake
+
+        with patch.object(resume_parser, 'PARSE_SECTION_CHUNKING', True), \
+                patch.object(resume_parser, 'PARSE_CHUNK_MIN_CHARS', 10), \
+                patch.object(resume_parser, 'PARSE_MODEL_TIERS', ['big']):
+            result = resume_parser.parse_resume_with_groq(self.TEXT)
+
+        self.assertEqual(mock_completion.call_count, 4)
+        self.assertEqual(resume_parser.validate_resume_json(result), [])
+        self.assertEqual(result['name'], 'Jane Doe')
+        self.assertEqual(result['experiences'][0]['institution_name'], 'ACME')
+        self.assertEqual(result['skills'][0]['items'], ['Python', 'SQL'])
+        self.assertEqual(result['projects'], [])
+
+
+class TestFieldExtraction(unittest.TestCase):
+    TEXT = (
+        "John Doe\nParis | +33 6 12 34 56 78 | John.Doe@Mail.com\n"
+        "linkedin.com/in/john-doe-123/ | github.com/johndoe\n"
+        "Data Engineer, ACME  Sept. 2021 - Present\n"
+        "Intern, Foo  01/2020 to 03/2021\nMSc, Bar  2018 – 2020\n"
+    )
+
+    def test_extract_fields(self):
+        fields = extract_fields(self.TEXT + "Contact: john.doe@mail.com\n")
+        # Original casing kept, duplicates removed case-insensitively
+        self.assertEqual(fields['emails'], ['John.Doe@Mail.com'])
+        self.assertEqual(fields['phones'], ['+33 6 12 34 56 78'])
+        self.assertEqual(fields['linkedin_url'], 'https://linkedin.com/in/john-doe-123')
+        self.assertEqual(fields['urls'], ['github.com/johndoe'])
+        self.assertEqual(
+            [(d['from'], d['to']) for d in fields['date_ranges']],
+            [('Sept. 2021', 'Present'), ('01/2020', '03/2021'), ('2018', '2020')]
+        )
+
+    def test_phones_are_not_ids_or_years(self):
+        for text in ("GPA 3.8/4.0 2019 2020", "SIRET 123 456 789 00012", "ID 12345678",
+                     "Years: 2019-2020-2021", "Ref 20192020"):
+            self.assertEqual(extract_fields(text)['phones'], [], text)
+        self.assertEqual(
+            extract_fields("06 12 34 56 78 | (555) 123-4567 | 01.23.45.67.89")['phones'],
+            ['06 12 34 56 78', '(555) 123-4567', '01.23.45.67.89']
+        )
+
+    def test_phone_stops_at_end_of_line(self):
+        fields = extract_fields("Tel: 06 12 34 56 78\n2020\nParis")
+        self.assertEqual(fields['phones'], ['06 12 34 56 78'])
+
+        fields = extract_fields("Tel: 06 12 34 56 78\n2018 - 2020 Engineer")
+        self.assertEqual(fields['phones'], ['06 12 34 56 78'])
+        self.assertEqual([(d['from'], d['to']) for d in fields['date_ranges']], [('2018', '2020')])
+
+    def test_split_contacts(self):
+        self.assertEqual(
+            split_contacts(['Paris 75011', 'jane@mail.com', '06.12.34.56.78']),
+            ('jane@mail.com', '06.12.34.56.78')
+        )
+        self.assertEqual(split_contacts(None), (None, None))
+
+    @patch('services.resume_parser.chat_completion')
+    def test_extracted_fields_are_hinted_and_override_output(self, mock_completion):
+        llm_output = resume_parser.repair_resume_json(
+            '{"name": "John Doe", "contacts": ["johndoe@mail", "https://johndoe.dev"],'
+            ' "linkedin_url": "linkedin.com/in/john", "experiences": [{"position_title": "Data Engineer"}]}'
+        )
+        mock_completion.return_value = fake_completion(llm_output)
+
+        with patch.object(resume_parser, 'PARSE_MODEL_TIERS', ['big']):
+            result = resume_parser.parse_resume_with_groq(self.TEXT)
+
+        prompt = mock_completion.call_args.kwargs['messages'][1]['content']
+        self.assertIn('- contacts (email/phone): John.Doe@Mail.com, +33 6 12 34 56 78', prompt)
+        self.assertIn('Sept. 2021 -> Present', prompt)
+        self.assertEqual(result['linkedin_url'], 'https://linkedin.com/in/john-doe-123')
+        self.assertEqual(result['contacts'], [
+            'John.Doe@Mail.com', '+33 6 12 34 56 78', 'johndoe@mail', 'https://johndoe.dev', 'github.com/johndoe'
+        ])
+
+
+class TestTextCompaction(unittest.TestCase):
+    TEXT = (
+        "--- Page 1 ---\n"
+        "ACME Corp  -  Confidential\n"
+        "Jane   Doe\n\n\n\n"
+        "Built a data pipeline that processes\n"
+        "millions of events per day with decision-\n"
+        "making dashboards.\n"
+        "• Python\n"
+        "1 / 2\n"
+        "--- Page 2 ---\n"
+        "ACME Corp - Confidential\n"
+        "EDUCATION\n"
+        "MSc Computer Science\n"
+        "Page 2 of 2\n"
+    )
+
+    def test_compaction(self):
+        self.assertEqual(compact_text(self.TEXT), (
+            "ACME Corp - Confidential\n"
+            "Jane Doe\n\n"
+            "Built a data pipeline that processes millions of events per day with decision-making dashboards.\n"
+            "• Python\n\n"
+            "EDUCATION\n"
+            "MSc Computer Science"
+        ))
+
+    def test_repeated_content_is_kept(self):
+        text = (
+            "--- Page 1 ---\n"
+            "Jane Doe - Resume\n"
+            "Email: jane@mail.com\n"
+            "EXPERIENCE\n"
+            "Software Engineer\n"
+            "Acme\n"
+            "2019 - 2021\n"
+            "Built the billing platform.\n"
+            "Designed the payment APIs.\n"
+            "Page 1 of 2\n"
+            "--- Page 2 ---\n"
+            "Jane Doe - Resume\n"
+            "Software Engineer\n"
+            "Beta\n"
+            "2017 - 2019\n"
+            "Maintained the data warehouse.\n"
+            "Wrote the ingestion jobs.\n"
+            "Page 2 of 2\n"
+        )
+        lines = compact_text(text).split("\n")
+        self.assertEqual(lines.count("Jane Doe - Resume"), 1)
+        self.assertEqual(lines.count("Software Engineer"), 2)
+        self.assertIn("2019 - 2021", lines)
+        self.assertIn("2017 - 2019", lines)
+        self.assertNotIn("Page 2 of 2", lines)
+
+    def test_token_budget(self):
+        text = "\n".join(f"Line number {i} of the resume" for i in range(100))
+        compacted = compact_text(text, max_tokens=50)
+        self.assertLessEqual(estimate_tokens(compacted), 50)
+        self.assertTrue(compacted.startswith("Line number 0 "))
+        self.assertTrue(compacted.endswith("of the resume"))
+
+
+def fake_stream(text, size=7, progress=None):
+    from types import SimpleNamespace
+    for i in range(0, len(text), size):
+        if progress is not None:
+            progress.append(i)
+        delta = SimpleNamespace(content=text[i:i + size])
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class TestStreamedParsing(unittest.TestCase):
+    TEXT = "--- Page 1 ---\nJane Doe\njane@mail.com\nDeveloper at ACME, Jan 2020 - Present\n"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.patches = [
+            patch.object(cache_module, 'CACHE_DIR', self.tmp_dir),
+            patch.dict(cache_module._caches, clear=True),
+            patch.object(resume_parser, 'process_file_bytes', return_value=self.TEXT),
+        ]
+        for p in self.patches:
+            p.start()
+        self.good = resume_parser.repair_resume_json(
+            '{"name": "Jane Doe", "contacts": ["<b>jane@mail.com</b>"],'
+            ' "experiences": [{"position_title": "Developer", "institution_name": "ACME"}]}'
+        )
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    @patch('services.resume_parser.chat_completion')
+    def test_sections_are_streamed_before_completion_ends(self, mock_completion):
+        import json
+        progress = []
+        mock_completion.return_value = fake_stream(json.dumps(self.good), progress=progress)
+
+        events = []
+        for event in resume_parser.stream_resume_bytes(b'%PDF', '.pdf'):
+            events.append((event, len(progress)))
+
+        kinds = [e['event'] for e, _ in events]
+        self.assertEqual(kinds[:2], ['text', 'header'])
+        self.assertEqual(kinds[-1], 'result')
+        self.assertEqual(events[1][0]['data']['emails'], ['jane@mail.com'])
+        self.assertTrue(mock_completion.call_args.kwargs['stream'])
+
+        sections = {e['name']: (e['data'], chunks_read) for e, chunks_read in events if e['event'] == 'section'}
+        self.assertEqual(set(sections), set(self.good))
+        self.assertEqual(sections['name'][0], 'Jane Doe')
+        self.assertEqual(sections['contacts'][0], ['jane@mail.com'])
+        # The first field is sent long before the whole completion has been read
+        self.assertLess(sections['name'][1], len(progress) / 2)
+
+        result = events[-1][0]
+        self.assertFalse(result['cached'])
+        self.assertEqual(result['data']['experiences'][0]['institution_name'], 'ACME')
+
+        cached = list(resume_parser.stream_resume_bytes(b'%PDF', '.pdf'))
+        self.assertEqual(mock_completion.call_count, 1)
+        self.assertEqual([e['event'] for e in cached[:3]], ['text', 'header', 'section'])
+        self.assertEqual(cached[1], events[1][0])
+        self.assertTrue(cached[-1]['cached'])
+        self.assertEqual(cached[-1]['data'], result['data'])
+
+    @patch('services.resume_parser.parse_resume_with_groq')
+    @patch('services.resume_parser.chat_completion')
+    def test_falls_back_to_regular_parse(self, mock_completion, mock_parse):
+        mock_completion.side_effect = Exception('streaming not supported')
+        mock_parse.return_value = self.good
+
+        events = list(resume_parser.stream_resume_bytes(b'%PDF', '.pdf'))
+        self.assertEqual(events[-1]['data'], self.good)
+        self.assertEqual(
+            [e['name'] for e in events if e['event'] == 'section'], list(self.good)
+        )
+
+    @patch('app.stream_resume_bytes')
+    def test_endpoint_streams_ndjson(self, mock_stream):
+        import io
+        import json
+        import app
+        mock_stream.return_value = iter([
+            {'event': 'text', 'chars': 10, 'tokens': 3, 'raw_tokens': 4},
+            {'event': 'result', 'data': None, 'cached': False},
+        ])
+        response = app.app.test_client().post('/api/parse-resume?stream=1', data={
+            'file': (io.BytesIO(b'%PDF'), 'cv.pdf')
+        }, content_type='multipart/form-data')
+
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(lines[0]['event'], 'text')
+        self.assertEqual(lines[1], {'event': 'error', 'error': 'Failed to parse resume with AI'})
+
+
+if __name__ == '__main__':
+    unittest.main()
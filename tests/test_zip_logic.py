@@ -6,12 +6,17 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import unittest
 import io
+import time
+import shutil
+import tempfile
+import threading
 import zipfile
 from unittest.mock import MagicMock, patch
 import app
 
 class TestZipUpload(unittest.TestCase):
     def setUp(self):
+        self._config = dict(app.app.config)
         app.app.config['TESTING'] = True
         app.app.config['UPLOAD_FOLDER'] = './test_uploads_zip'
         os.makedirs(app.app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -21,6 +26,7 @@ class TestZipUpload(unittest.TestCase):
         import shutil
         if os.path.exists(app.app.config['UPLOAD_FOLDER']):
             shutil.rmtree(app.app.config['UPLOAD_FOLDER'])
+        app.app.config.update(self._config)
 
     def create_dummy_pdf(self, content="dummy pdf content"):
         return io.BytesIO(content.encode('utf-8'))
@@ -77,5 +83,167 @@ class TestZipUpload(unittest.TestCase):
         self.assertEqual(errors[0]['filename'], 'bad_file.txt')
         self.assertIn('Invalid file type', errors[0]['error'])
 
+    @patch('app.process_single_resume')
+    def test_zip_upload_concurrent_keeps_order(self, mock_process):
+        import time
+        
+        def fake_process(filepath, filename, job_offer_id):
+            # Earlier files finish last
+            time.sleep(0.05 if filename == 'a.pdf' else 0.0)
+            if filename == 'broken.pdf':
+                raise Exception('OCR failed')
+            return {'filename': filename}
+        mock_process.side_effect = fake_process
+        
+        app.app.config['ZIP_CONCURRENCY'] = 3
+        zip_file = self.create_zip_with_files({
+            'a.pdf': 'a',
+            'broken.pdf': 'b',
+            'notes.txt': 'c',
+            'd.png': 'd',
+        })
+        
+        response = self.client.post('/api/upload-resume', data={
+            'file': (zip_file, 'resumes.zip')
+        }, content_type='multipart/form-data')
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.json
+        self.assertEqual([r['filename'] for r in data['data']], ['a.pdf', 'd.png'])
+        self.assertEqual([e['filename'] for e in data['errors']], ['broken.pdf', 'notes.txt'])
+        self.assertEqual(data['errors'][0]['error'], 'OCR failed')
+
+    @patch('app.process_single_resume')
+    def test_zip_members_streamed_with_size_limits(self, mock_process):
+        mock_process.side_effect = lambda content, filename, job_offer_id: {
+            'filename': filename, 'size': len(content)
+        }
+        
+        app.app.config['ZIP_MAX_MEMBER_SIZE'] = 10
+        zip_file = self.create_zip_with_files({
+            'folder/small.pdf': 'x' * 10,
+            'big.pdf': 'x' * 11,
+        })
+        
+        response = self.client.post('/api/upload-resume', data={
+            'file': (zip_file, 'resumes.zip')
+        }, content_type='multipart/form-data')
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.json
+        # Members are handed over as bytes, nothing is extracted to disk
+        self.assertEqual(data['data'], [{'filename': 'small.pdf', 'size': 10}])
+        self.assertEqual(data['errors'][0]['filename'], 'big.pdf')
+        self.assertIn('File too large', data['errors'][0]['error'])
+        self.assertEqual(os.listdir(app.app.config['UPLOAD_FOLDER']), [])
+
+    @patch('app.process_single_resume')
+    def test_zip_total_size_limit(self, mock_process):
+        app.app.config['ZIP_MAX_TOTAL_SIZE'] = 15
+        zip_file = self.create_zip_with_files({
+            'a.pdf': 'x' * 10,
+            'b.pdf': 'x' * 10,
+        })
+        
+        response = self.client.post('/api/upload-resume', data={
+            'file': (zip_file, 'resumes.zip')
+        }, content_type='multipart/form-data')
+        
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(response.json['success'])
+        mock_process.assert_not_called()
+
+class FakeCandidates:
+    """In-memory candidates table with a slow lookup (Supabase round-trip)."""
+
+    def __init__(self):
+        self.rows = []
+        self.lock = threading.Lock()
+
+    def find(self, email):
+        with self.lock:
+            found = next((row['id'] for row in self.rows if row['email'].lower() == email.lower()), None)
+        time.sleep(0.05)
+        return found
+
+    def insert(self, data):
+        with self.lock:
+            self.rows.append(dict(data, id=f"cand-{len(self.rows) + 1}"))
+            return MagicMock(data=[self.rows[-1]])
+
+    def client(self):
+        supabase = MagicMock()
+        supabase.table.return_value.insert.side_effect = lambda data: MagicMock(
+            execute=lambda: self.insert(data))
+        return supabase
+
+
+class TestBatchCandidates(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.candidates = FakeCandidates()
+        self.patches = [
+            patch('services.db.CANDIDATE_LOCK_DIR', self.tmp_dir),
+            patch('services.db.init_supabase', self.candidates.client),
+            patch('services.db.find_candidate_by_email', side_effect=self.candidates.find),
+            patch('services.db.upload_resume_file_dedup', return_value='https://storage/resume.pdf'),
+            patch('services.db.create_resume', return_value='resume-id'),
+            patch('services.db.create_application', return_value=None),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    @patch('app.parse_resume_bytes')
+    def test_same_candidate_in_one_batch_is_created_once(self, mock_parse):
+        # EN and FR versions of the same resume, processed at the same time
+        mock_parse.side_effect = lambda content, ext, on_fields=None: {
+            'name': 'Jane Doe',
+            'contacts': ['Jane.Doe@mail.com' if content == b'en' else 'jane.doe@mail.com'],
+        }
+        entries = [('jane_en.pdf', lambda: b'en'), ('jane_fr.pdf', lambda: b'fr')]
+
+        results, errors = app.process_resume_batch(entries, None, max_workers=2)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.candidates.rows), 1)
+        self.assertEqual({r['candidate_id'] for r in results}, {'cand-1'})
+
+
+    @patch('app.parse_resume_bytes')
+    def test_early_lookup_miss_is_checked_again(self, mock_parse):
+        def parse(content, ext, on_fields=None):
+            on_fields({'emails': ['jane@mail.com']})
+            # Created by another worker while the resume was being parsed
+            time.sleep(0.1)
+            self.candidates.insert({'email': 'jane@mail.com'})
+            return {'name': 'Jane Doe', 'contacts': ['jane@mail.com']}
+        mock_parse.side_effect = parse
+
+        result = app.process_single_resume(b'pdf', 'jane.pdf', None)
+
+        self.assertEqual(result['candidate_id'], 'cand-1')
+        self.assertEqual(len(self.candidates.rows), 1)
+
+    @patch('app.parse_resume_bytes')
+    def test_early_lookup_hit_is_reused(self, mock_parse):
+        self.candidates.insert({'email': 'jane@mail.com'})
+
+        def parse(content, ext, on_fields=None):
+            on_fields({'emails': ['jane@mail.com']})
+            return {'name': 'Jane Doe', 'contacts': ['jane@mail.com']}
+        mock_parse.side_effect = parse
+
+        with patch('services.db._candidate_lock') as mock_lock:
+            result = app.process_single_resume(b'pdf', 'jane.pdf', None)
+
+        self.assertEqual(result['candidate_id'], 'cand-1')
+        mock_lock.assert_not_called()
+
+
 if __name__ == '__main__':
     unittest.main()